@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from unittest.mock import patch
+
+from valhalla.commit.commit import GitRepository
+
+FILES_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+FILES_PER_DIRECTORY = 500
+UNTRACKED_COUNT = 50
+REPEAT = 5
+
+
+def generate_repository(path: str):
+    directories = FILES_COUNT // FILES_PER_DIRECTORY
+    for d in range(directories):
+        directory = os.path.join(path, "modules", f"module-{d}")
+        os.makedirs(directory)
+        for f in range(FILES_PER_DIRECTORY):
+            with open(os.path.join(directory, f"file-{f}.txt"), "w") as file:
+                file.write(f"{d}-{f}\n")
+
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "-q", "-m", "init"],
+                   cwd=path, check=True)
+
+    # files generated by release
+    os.makedirs(os.path.join(path, "docs"))
+    for f in range(UNTRACKED_COUNT):
+        with open(os.path.join(path, "docs", f"page-{f}.md"), "w") as file:
+            file.write("generated\n")
+
+
+def measure(repository: GitRepository) -> float:
+    # first scan fills untracked cache, it is done by first status in commit
+    repository.status_snapshot()
+    return min(timeit.repeat(repository.status_snapshot, number=1, repeat=REPEAT))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"generating repository with {FILES_COUNT} files...")
+        generate_repository(tmp)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            with patch('valhalla.commit.commit.info'), patch('valhalla.commit.commit.warn'):
+                default = GitRepository("bench", "bench@example.com")
+                large = GitRepository("bench", "bench@example.com", large_repository=True)
+                large_with_paths = GitRepository("bench", "bench@example.com", large_repository=True, paths=["docs"])
+
+                assert len(default.status_snapshot().untracked) == UNTRACKED_COUNT
+                assert len(large_with_paths.status_snapshot().untracked) == UNTRACKED_COUNT
+
+                default_time = measure(default)
+                large_time = measure(large)
+                paths_time = measure(large_with_paths)
+                large.close()
+                large_with_paths.close()
+
+            print(f"git options in large repository mode: {large.git_options}")
+            print(f"status (default):                  {default_time * 1000:.1f} ms")
+            print(f"status (large repository):         {large_time * 1000:.1f} ms")
+            print(f"status (large repository, paths):  {paths_time * 1000:.1f} ms")
+            print(f"speedup: {default_time / large_time:.1f}x, with paths: {default_time / paths_time:.1f}x")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import copy
+import sys
+import timeit
+
+from valhalla.extends.merge_dicts import merge
+
+DEPTH = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+WIDTH = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+REPEAT = 5
+
+
+def copying_merge(parent: dict, child: dict):
+    # previous implementation, copies both subtrees again on every level
+    def __merge(parent_org, child_org):
+        parent_copy = copy.deepcopy(parent_org)
+        child_copy = copy.deepcopy(child_org)
+        if isinstance(child_copy, dict):
+            for k, v in child_copy.items():
+                parent_copy[k] = __merge(parent_copy.get(k), v) if k in parent_copy else v
+            return parent_copy
+        return child_copy
+
+    return __merge(copy.deepcopy(parent), copy.deepcopy(child))
+
+
+def deep(depth: int, leaf: str) -> dict:
+    result = {"value": leaf, "list": [leaf] * 10}
+    for i in range(depth):
+        result = {f"level-{i}": result, f"sibling-{i}": {"value": leaf}}
+    return result
+
+
+def wide(width: int, leaf: str) -> dict:
+    return {"variables": {f"VARIABLE_{i}": f"{leaf}-{i}" for i in range(width)},
+            "before": [{"id": f"step-{i}", "command": f"echo {leaf} {i}"} for i in range(width // 10)]}
+
+
+def measure(name: str, parent: dict, child: dict):
+    assert merge(parent, child) == copying_merge(parent, child)
+    copying = min(timeit.repeat(lambda: copying_merge(parent, child), number=1, repeat=REPEAT))
+    copy_free = min(timeit.repeat(lambda: merge(parent, child), number=1, repeat=REPEAT))
+    shared = min(timeit.repeat(lambda: merge(parent, child, share=True), number=1, repeat=REPEAT))
+    print(f"{name}: copying {copying * 1000:.1f} ms, one traversal {copy_free * 1000:.1f} ms "
+          f"({copying / copy_free:.1f}x), shared {shared * 1000:.2f} ms ({copying / shared:.1f}x)")
+
+
+def main():
+    measure(f"deep (depth {DEPTH})", deep(DEPTH, "parent"), deep(DEPTH, "child"))
+    measure(f"wide (width {WIDTH})", wide(WIDTH, "parent"), wide(WIDTH, "child"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import random
+import string
+import timeit
+
+from valhalla.common.redactor import Redactor, get_secret_variants
+
+SECRETS_COUNTS = [1, 10, 100, 200, 500, 1000, 5000]
+REPEAT = 200
+
+
+def random_secret(length: int = 32) -> str:
+    return "".join(random.choice(string.ascii_letters + string.digits) for _ in range(length))
+
+
+def naive_redact(variants, msg: str) -> str:
+    for secret in variants:
+        msg = msg.replace(secret, "*" * len(secret))
+    return msg
+
+
+def main():
+    random.seed(42)
+    message = "\n".join(f"[INFO] Downloaded artifact {i} from https://repo.example.com/path/{i}.jar"
+                        for i in range(100))
+
+    print(f"message length: {len(message)}, redactions: {REPEAT}")
+    for count in SECRETS_COUNTS:
+        secrets = [random_secret() for _ in range(count)]
+        redactor = Redactor(secrets)
+        # the same URL-encoded and base64 forms are hidden by both
+        variants = {variant for secret in secrets for variant in get_secret_variants(secret)}
+        naive = timeit.timeit(lambda: naive_redact(variants, message), number=REPEAT)
+        current = timeit.timeit(lambda: redactor.redact(message), number=REPEAT)
+        print(f"secrets: {count:5} (variants: {redactor.secrets_count:5}) "
+              f"naive: {naive * 1000:8.2f} ms  redactor: {current * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import os
+import timeit
+
+import valhalla.common.resolver as resolver
+
+ENV_VARIABLES_COUNT = 300
+REPEAT = 2000
+
+TEMPLATE = "Releasing version {VERSION} ({VERSION_SLUG}) by {AUTHOR}, see {CI_PROJECT_URL} and {MY_VARIABLE}"
+
+
+def legacy_resolve(string: str):
+    # previous implementation: str.replace for every known variable and every environment variable
+    string = string.replace("{VERSION}", resolver.VERSION)
+    string = string.replace("{VERSION_MAJOR}", resolver.VERSION_MAJOR)
+    string = string.replace("{VERSION_MINOR}", resolver.VERSION_MINOR)
+    string = string.replace("{VERSION_PATCH}", resolver.VERSION_PATCH)
+    string = string.replace("{VERSION_SLUG}", resolver.VERSION_SLUG)
+    string = string.replace("{VALHALLA_TOKEN}", resolver.VALHALLA_TOKEN)
+    string = string.replace("{AUTHOR}", resolver.AUTHOR)
+
+    for key, value in resolver.CUSTOM_VARIABLES_DICT.items():
+        string = string.replace("{" + key + "}", value)
+
+    for env_var in os.environ:
+        if os.environ.get(env_var, '') is not None:
+            string = string.replace('{' + env_var + '}', os.environ.get(env_var, ''))
+    return string
+
+
+def main():
+    for i in range(ENV_VARIABLES_COUNT):
+        os.environ[f"BENCHMARK_ENV_VAR_{i}"] = f"value_{i}"
+    os.environ["CI_PROJECT_URL"] = "https://gitlab.com/logchange/valhalla"
+
+    resolver.init_str_resolver("token123", "kot")
+    resolver.init_str_resolver_set_version("1.2.3")
+    resolver.init_str_resolver_custom_variables({"MY_VARIABLE": "custom", "IMAGE": "registry/{CI_PROJECT_URL}:x"})
+
+    assert legacy_resolve(TEMPLATE) == resolver.resolve(TEMPLATE, suppress_log=True)
+    # env variables inside custom variables are resolved like in previous implementation
+    assert legacy_resolve("{IMAGE}") == resolver.resolve("{IMAGE}", suppress_log=True) \
+           == "registry/https://gitlab.com/logchange/valhalla:x"
+
+    legacy = timeit.timeit(lambda: legacy_resolve(TEMPLATE), number=REPEAT)
+    current = timeit.timeit(lambda: (resolver.clear_resolve_cache(), resolver.resolve(TEMPLATE, suppress_log=True)),
+                            number=REPEAT)
+    cached = timeit.timeit(lambda: resolver.resolve(TEMPLATE, suppress_log=True), number=REPEAT)
+
+    print(f"environment variables: {len(os.environ)}, resolves: {REPEAT}")
+    print(f"legacy resolve:  {legacy * 1000:.2f} ms")
+    print(f"current resolve: {current * 1000:.2f} ms")
+    print(f"cached resolve:  {cached * 1000:.2f} ms")
+    print(f"speedup: {legacy / current:.1f}x, with cache: {legacy / cached:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import sys
+import timeit
+
+import yaml
+
+from valhalla.common.yaml_loader import load_yaml, is_libyaml_loader
+
+SECTIONS_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+REPEAT = 5
+
+
+def generate_config(sections: int) -> str:
+    # organisation base config: many variables, before commands and release assets
+    lines = ["git_host: gitlab", "variables:"]
+    lines += [f"  VARIABLE_{i}: \"value-{i}-{{VERSION}}\"" for i in range(sections)]
+    lines += ["commit_before_release:", "  enabled: True", "  msg: \"Releasing version {VERSION}\"", "  before:"]
+    for i in range(sections):
+        lines += [f"    - id: step-{i}",
+                  f"      command: \"echo step {i} && ./scripts/build.sh --module module-{i}\"",
+                  f"      needs: [ step-{i - 1} ]" if i else "      needs: []",
+                  "      cache:",
+                  "        files: [ \"pom.xml\", \"**/pom.xml\" ]",
+                  "        env: [ MAVEN_OPTS ]"]
+    lines += ["release:", "  description:", "    from_command: \"cat changelog-{VERSION}.md\"", "  assets:",
+              "    links:"]
+    for i in range(sections):
+        lines += [f"      - name: artifact-{i}",
+                  f"        url: https://example.com/artifacts/{i}/app-{{VERSION}}.jar",
+                  "        link_type: package"]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    config = generate_config(SECTIONS_COUNT)
+    print(f"config with {config.count(chr(10))} lines, {len(config) // 1024} KB")
+    assert load_yaml(config) == yaml.safe_load(config)
+
+    python_time = min(timeit.repeat(lambda: yaml.safe_load(config), number=1, repeat=REPEAT))
+    valhalla_time = min(timeit.repeat(lambda: load_yaml(config), number=1, repeat=REPEAT))
+
+    print(f"libyaml available: {is_libyaml_loader()}")
+    print(f"yaml.safe_load:  {python_time * 1000:.1f} ms")
+    print(f"load_yaml:       {valhalla_time * 1000:.1f} ms")
+    print(f"speedup: {python_time / valhalla_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
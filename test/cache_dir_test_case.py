@@ -0,0 +1,18 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+
+class CacheDirTestCase(unittest.TestCase):
+    """
+    Points VALHALLA_CACHE_DIR to temporary directory, so tests do not read or write cache of user running them.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_root = os.path.join(self.tmp.name, "cache")
+        env = patch.dict(os.environ, {"VALHALLA_CACHE_DIR": self.cache_root})
+        env.start()
+        self.addCleanup(env.stop)
@@ -155,6 +155,40 @@ class GitHubMergeRequestTest(unittest.TestCase):
             mock_client.post.assert_any_call(expected_comment_url, json={"body": "My comment"})
             mock_info.assert_any_call(f"Adding comment to pull request: {expected_comment_url}")
 
+    @patch("valhalla.ci_provider.github.merge_request.GitHubClient")
+    @patch("valhalla.ci_provider.github.merge_request.resolve")
+    @patch("valhalla.ci_provider.github.merge_request.info")
+    @patch("valhalla.ci_provider.github.merge_request.warn")
+    def test_update_status_creates_and_edits_issue_comment(self, mock_warn, mock_info, mock_resolve, mock_client_cls):
+        # given
+        with patch.dict('os.environ', {'GITHUB_REF_NAME': 'feature-branch'}):
+            mock_resolve.side_effect = lambda x: x
+            mock_client = MagicMock()
+            mock_client.api_url = "https://api.github.com"
+            mock_client.repo = "owner/repo"
+
+            pr_response = MagicMock()
+            pr_response.status_code = 201
+            pr_response.json.return_value = {"html_url": "url", "number": 123, "id": 555}
+
+            mock_client.post.return_value = pr_response
+            mock_client.patch.return_value = MagicMock(status_code=200)
+            mock_client_cls.return_value = mock_client
+
+            pr = GitHubValhallaPullRequest()
+            config = MergeRequestConfig(enabled=True, target_branch="main", title="T", description="D", reviewers=[])
+
+            # when
+            hook = pr.create(config)
+            hook.update_status("started")
+            hook.update_status("finished")
+
+            # then
+            mock_client.post.assert_any_call("https://api.github.com/repos/owner/repo/issues/123/comments",
+                                             json={"body": "started"})
+            mock_client.patch.assert_called_once_with("https://api.github.com/repos/owner/repo/issues/comments/555",
+                                                      json={"body": "finished"})
+
     @patch("valhalla.ci_provider.github.merge_request.GitHubClient")
     @patch("valhalla.ci_provider.github.merge_request.resolve")
     @patch("valhalla.ci_provider.github.merge_request.info")
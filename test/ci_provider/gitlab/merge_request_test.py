@@ -145,6 +145,45 @@ class TestGitLabValhallaMergeRequest(unittest.TestCase):
             mock_project.mergerequests.get.assert_called_once_with(101, iid=True)
             mock_mr_obj.notes.create.assert_called_once_with({'body': "Test comment"})
 
+    @patch("valhalla.ci_provider.gitlab.merge_request.get_gitlab_client")
+    @patch("valhalla.ci_provider.gitlab.merge_request.get_project_id")
+    @patch("valhalla.ci_provider.gitlab.merge_request.resolve")
+    @patch("valhalla.ci_provider.gitlab.merge_request.info")
+    @patch("valhalla.ci_provider.gitlab.merge_request.warn")
+    def test_update_status_creates_and_edits_note(self, mock_warn, mock_info, mock_resolve, mock_get_project_id,
+                                                  mock_get_gitlab_client):
+        with patch.dict('os.environ', {'CI_COMMIT_BRANCH': 'feature-branch'}):
+            # given:
+            mock_get_project_id.return_value = "123"
+            mock_resolve.side_effect = lambda x: x
+            mock_gitlab_client = MagicMock()
+            mock_project = MagicMock()
+            mock_mr_instance = MagicMock()
+            mock_mr_instance.iid = 101
+            mock_project.mergerequests.create.return_value = mock_mr_instance
+            mock_gitlab_client.projects.get.return_value = mock_project
+            mock_get_gitlab_client.return_value = mock_gitlab_client
+
+            mock_mr_obj = MagicMock()
+            mock_mr_obj.notes.create.return_value = MagicMock(id=777)
+            mock_note = MagicMock()
+            mock_mr_obj.notes.get.return_value = mock_note
+            mock_project.mergerequests.get.return_value = mock_mr_obj
+
+            merge_request = GitLabValhallaMergeRequest()
+            config = MergeRequestConfig(enabled=True, target_branch="main", title="T", description="D", reviewers=[])
+
+            # when:
+            hook = merge_request.create(config)
+            hook.update_status("started")
+            hook.update_status("finished")
+
+            # then:
+            mock_mr_obj.notes.create.assert_called_once_with({'body': "started"})
+            mock_mr_obj.notes.get.assert_called_once_with(777, lazy=True)
+            self.assertEqual("finished", mock_note.body)
+            mock_note.save.assert_called_once()
+
     @patch("valhalla.ci_provider.gitlab.merge_request.get_gitlab_client")
     @patch("valhalla.ci_provider.gitlab.merge_request.get_project_id")
     @patch("valhalla.ci_provider.gitlab.merge_request.resolve")
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 
-from valhalla.ci_provider.merge_request_hook import MergeRequestHook
+from valhalla.ci_provider.merge_request_hook import MergeRequestHook, MAX_STATUS_WARNINGS
 
 
 class MergeRequestHookTest(unittest.TestCase):
@@ -55,3 +55,67 @@ class MergeRequestHookTest(unittest.TestCase):
         # then:
         self.assertEqual(hook.id, 123)
         self.assertIsNone(hook._add_comment_impl)
+
+    def test_update_status_creates_comment_and_then_edits_it(self):
+        # given:
+        create_impl = MagicMock(return_value=42)
+        edit_impl = MagicMock()
+        hook = MergeRequestHook(1, MagicMock(), create_impl, edit_impl)
+
+        # when:
+        hook.update_status("started")
+        hook.add_status_warning("[WARN] something")
+        hook.update_status("finished")
+
+        # then:
+        create_impl.assert_called_once_with("started")
+        self.assertEqual([
+            (42, "started\n\n⚠️ Warnings: 1\n\n[WARN] something"),
+            (42, "finished\n\n⚠️ Warnings: 1\n\n[WARN] something"),
+        ], [c.args for c in edit_impl.call_args_list])
+        hook._add_comment_impl.assert_not_called()
+
+    def test_status_shows_only_latest_warnings(self):
+        # given:
+        edit_impl = MagicMock()
+        hook = MergeRequestHook(1, MagicMock(), MagicMock(return_value=42), edit_impl)
+        hook.update_status("started")
+
+        # when:
+        for i in range(MAX_STATUS_WARNINGS + 5):
+            hook.add_status_warning(f"warn {i}")
+
+        # then:
+        body = edit_impl.call_args.args[1]
+        self.assertIn(f"⚠️ Warnings: {MAX_STATUS_WARNINGS + 5} (showing latest {MAX_STATUS_WARNINGS})", body)
+        self.assertNotIn("warn 4\n", body)
+        self.assertIn(f"warn {MAX_STATUS_WARNINGS + 4}", body)
+
+    def test_update_status_without_status_support_adds_comment(self):
+        # given:
+        add_comment_impl = MagicMock()
+        hook = MergeRequestHook(1, add_comment_impl)
+
+        # when:
+        hook.update_status("started")
+        hook.add_status_warning("[WARN] something")
+
+        # then:
+        self.assertFalse(hook.supports_status())
+        self.assertEqual(["started", "[WARN] something"], [c.args[0] for c in add_comment_impl.call_args_list])
+
+    @patch('valhalla.common.logger.warn')
+    def test_failing_status_falls_back_to_comments(self, mock_warn):
+        # given:
+        add_comment_impl = MagicMock()
+        hook = MergeRequestHook(1, add_comment_impl, MagicMock(side_effect=Exception("forbidden")), MagicMock())
+
+        # when:
+        hook.update_status("started")
+        hook.update_status("finished")
+
+        # then:
+        self.assertFalse(hook.supports_status())
+        mock_warn.assert_called_once()
+        add_comment_impl.assert_called_once_with("finished")
+
@@ -1,6 +1,10 @@
+import io
+import resource
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, Mock, call, MagicMock
-from valhalla.commit.before import execute  # Adjust the import according to your module structure
+from valhalla.commit.before import execute, get_before_commands  # Adjust the import according to your module structure
 
 
 class TestExecuteFunction(unittest.TestCase):
@@ -10,43 +14,187 @@ class TestExecuteFunction(unittest.TestCase):
     @patch('valhalla.common.executor.info')
     @patch('valhalla.commit.before.info')
     @patch('valhalla.commit.before.error')
-    @patch('valhalla.common.executor.subprocess.run')
-    def test_execute_success(self, mock_subprocess_run: Mock, mock_error: Mock, mock_info: Mock, mock_executor_info: Mock, mock_resolve: Mock, mock_exit: Mock):
+    @patch('valhalla.common.executor.subprocess.Popen')
+    @patch('valhalla.common.executor.os.wait4')
+    def test_execute_success(self, mock_wait4: Mock, mock_popen: Mock, mock_error: Mock, mock_info: Mock, mock_executor_info: Mock, mock_resolve: Mock, mock_exit: Mock):
         # given:
         mock_resolve.side_effect = lambda x: x
-        mock_result = MagicMock()
-        mock_result.returncode = 0
-        mock_result.stdout = "Hello World\n"
-        mock_result.stderr = ""
-        mock_subprocess_run.return_value = mock_result
+        mock_process = MagicMock()
+        mock_process.stdout = io.StringIO("Hello World\n")
+        mock_process.stderr = io.StringIO("")
+        mock_process.pid = 4242
+        mock_popen.return_value = mock_process
+        mock_wait4.return_value = (4242, 0, resource.struct_rusage((0,) * 16))
 
         # when:
         execute(["echo 'Hello World'"])
 
         # then:
-        mock_executor_info.assert_called_with("Output for command 'echo 'Hello World'':\nHello World\n")
+        mock_executor_info.assert_any_call("Output for command 'echo 'Hello World'':")
+        mock_executor_info.assert_called_with("Hello World")
         mock_info.assert_called_with("Successfully executed command: 'echo 'Hello World''")
         mock_error.assert_not_called()
         mock_exit.assert_not_called()
+        mock_wait4.assert_called_once_with(4242, 0)
 
     @patch('valhalla.commit.before.exit')
     @patch('valhalla.commit.before.resolve')
     @patch('valhalla.common.executor.error')
     @patch('valhalla.commit.before.info')
     @patch('valhalla.commit.before.error')
-    @patch('valhalla.common.executor.subprocess.run')
-    def test_execute_error(self, mock_subprocess_run: Mock, mock_error: Mock, mock_info: Mock, mock_executor_error: Mock, mock_resolve: Mock, mock_exit: Mock):
+    @patch('valhalla.common.executor.subprocess.Popen')
+    @patch('valhalla.common.executor.os.wait4')
+    def test_execute_error(self, mock_wait4: Mock, mock_popen: Mock, mock_error: Mock, mock_info: Mock, mock_executor_error: Mock, mock_resolve: Mock, mock_exit: Mock):
         # given:
         mock_resolve.side_effect = lambda x: x
-        mock_result = MagicMock()
-        mock_result.returncode = 1
-        mock_result.stdout = ""
-        mock_result.stderr = "mvn error"
-        mock_subprocess_run.return_value = mock_result
+        mock_process = MagicMock()
+        mock_process.stdout = io.StringIO("")
+        mock_process.stderr = io.StringIO("mvn error")
+        mock_process.pid = 4242
+        mock_popen.return_value = mock_process
+        mock_wait4.return_value = (4242, 1 << 8, resource.struct_rusage((0,) * 16))
 
         # when:
         execute(["mvn clean"])
 
         # then:
-        mock_executor_error.assert_called_with("Error output for command 'mvn clean':\nmvn error")
+        mock_executor_error.assert_called_with("Error output for command 'mvn clean' (last lines):\nmvn error")
         mock_exit.assert_called_with(1)
+
+
+class TestBeforeCommandsGraph(unittest.TestCase):
+
+    def test_plain_commands_depend_on_previous_one(self):
+        # when:
+        commands = get_before_commands(["echo 1", {"id": "docs", "command": "echo docs"}, "echo 2"])
+
+        # then:
+        self.assertEqual([[], [], ["docs"]], [c.needs for c in commands])
+        self.assertEqual(["command-1", "docs", "command-3"], [c.id for c in commands])
+
+    @patch('valhalla.commit.before.error')
+    def test_cyclic_needs_are_rejected(self, mock_error: Mock):
+        # given:
+        commands = [{"id": "a", "command": "echo a", "needs": ["b"]},
+                    {"id": "b", "command": "echo b", "needs": "a"}]
+
+        # when:
+        with self.assertRaises(SystemExit):
+            get_before_commands(commands)
+
+        # then:
+        mock_error.assert_called_with("Before commands have cyclic needs: ['a', 'b']! Fix your valhalla.yml!")
+
+    @patch('valhalla.commit.before.error')
+    def test_unknown_needs_are_rejected(self, mock_error: Mock):
+        # when:
+        with self.assertRaises(SystemExit):
+            get_before_commands([{"id": "a", "command": "echo a", "needs": ["missing"]}])
+
+        # then:
+        mock_error.assert_called_with("Before command a needs unknown commands: ['missing']! Fix your valhalla.yml!")
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.commit.before.info')
+    def test_execute_runs_independent_commands_in_parallel_after_needs(self, mock_info: Mock, mock_executor_info: Mock):
+        with tempfile.TemporaryDirectory() as tmp:
+            # given:
+            # a and b finish only when they see that the other one started, so they must run at the same time
+            def wait_for(other):
+                return f"for i in $(seq 200); do [ -f {tmp}/{other}.started ] && break; sleep 0.05; done; " \
+                       f"[ -f {tmp}/{other}.started ]"
+
+            commands = [
+                {"id": "first", "command": f"echo first >> {tmp}/order"},
+                {"id": "a", "command": f"touch {tmp}/a.started; {wait_for('b')} && echo a >> {tmp}/order",
+                 "needs": ["first"]},
+                {"id": "b", "command": f"touch {tmp}/b.started; {wait_for('a')} && echo b >> {tmp}/order",
+                 "needs": ["first"]},
+                {"id": "last", "command": f"echo last >> {tmp}/order", "needs": ["a", "b"]},
+            ]
+
+            # when:
+            execute(commands, parallel=2)
+
+            # then:
+            with open(f"{tmp}/order") as f:
+                order = f.read().split()
+            self.assertEqual("first", order[0])
+            self.assertEqual({"a", "b"}, set(order[1:3]))
+            self.assertEqual("last", order[3])
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.common.executor.error')
+    @patch('valhalla.commit.before.info')
+    @patch('valhalla.commit.before.error')
+    def test_execute_stops_other_commands_on_failure(self, mock_error: Mock, mock_info: Mock, mock_executor_error: Mock,
+                                                     mock_executor_info: Mock):
+        # given:
+        commands = [
+            {"id": "slow", "command": "sleep 10"},
+            {"id": "failing", "command": "exit 3"},
+            {"id": "never", "command": "echo never", "needs": ["slow", "failing"]},
+        ]
+
+        # when:
+        started = time.monotonic()
+        with self.assertRaises(SystemExit) as ctx:
+            execute(commands, parallel=2)
+
+        # then:
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(3, ctx.exception.code)
+        self.assertIn("Executing command exit 3 finished with code: 3", mock_error.call_args[0][0])
+        mock_info.assert_any_call("Command slow finished after failure of failing")
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.commit.before.info')
+    def test_execute_stops_other_commands_when_command_raises(self, mock_info: Mock, mock_executor_info: Mock):
+        # given:
+        def resolve(command):
+            if command == "broken":
+                raise OSError("cache input cannot be read")
+            return command
+
+        commands = [
+            {"id": "slow", "command": "sleep 10"},
+            {"id": "broken", "command": "broken"},
+        ]
+
+        # when:
+        started = time.monotonic()
+        with patch('valhalla.commit.before.resolve', side_effect=resolve):
+            with self.assertRaises(OSError):
+                execute(commands, parallel=2)
+
+        # then:
+        self.assertLess(time.monotonic() - started, 5)
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.commit.before.info')
+    def test_execute_in_session_shares_shell_state(self, mock_info: Mock, mock_executor_info: Mock):
+        with tempfile.TemporaryDirectory() as tmp:
+            # when:
+            execute([f"cd {tmp}", "export NAME=valhalla", "echo $NAME > result"], session=True)
+
+            # then:
+            with open(f"{tmp}/result") as f:
+                self.assertEqual("valhalla\n", f.read())
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.commit.before.warn')
+    @patch('valhalla.commit.before.info')
+    def test_execute_ignores_session_when_parallel(self, mock_info: Mock, mock_warn: Mock, mock_executor_info: Mock):
+        # when:
+        execute(["true"], parallel=2, session=True)
+
+        # then:
+        mock_warn.assert_called_once_with("Shell session cannot be shared by commands executed in parallel, "
+                                          "executing every command in new shell")
+
+    def test_commands_without_own_timeout_use_default_one(self):
+        # when:
+        commands = get_before_commands(["echo 1", {"id": "long", "command": "./long.sh", "timeout": 600}], timeout=60)
+
+        # then:
+        self.assertEqual([60.0, 600.0], [c.timeout for c in commands])
@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import patch, Mock
+
+from valhalla.commit.ignore import IgnoreMatcher, create_ignore_matcher
+
+
+class IgnoreMatcherTest(unittest.TestCase):
+
+    def test_default_patterns_ignore_m2(self):
+        matcher = create_ignore_matcher(None)
+
+        self.assertTrue(matcher.is_ignored(".m2/repository/file.jar"))
+        self.assertFalse(matcher.is_ignored(".m2"))
+        self.assertFalse(matcher.is_ignored("src/main.py"))
+
+    def test_default_patterns_do_not_ignore_nested_m2(self):
+        matcher = create_ignore_matcher(None)
+
+        self.assertFalse(matcher.is_ignored("sub/.m2/x"))
+        self.assertTrue(create_ignore_matcher([".m2/"]).is_ignored("sub/.m2/x"))
+
+    def test_unanchored_patterns_match_at_any_level(self):
+        matcher = IgnoreMatcher(["*.bak", "node_modules/.cache/", ".gradle/", "build"])
+
+        self.assertTrue(matcher.is_ignored("pom.xml.bak"))
+        self.assertTrue(matcher.is_ignored("module/pom.xml.bak"))
+        self.assertTrue(matcher.is_ignored("node_modules/.cache/babel/x.json"))
+        self.assertTrue(matcher.is_ignored("app/.gradle/8.0/file.lock"))
+        self.assertTrue(matcher.is_ignored("app/build/classes/A.class"))
+        self.assertTrue(matcher.is_ignored("build"))
+        self.assertFalse(matcher.is_ignored("node_modules/lib/index.js"))
+        self.assertFalse(matcher.is_ignored("src/build.gradle"))
+        self.assertFalse(matcher.is_ignored("bak/file.txt"))
+
+    def test_anchored_and_double_star_patterns(self):
+        matcher = IgnoreMatcher(["/target", "docs/**/generated", "logs/**", "file-?.[ch]", "# comment", ""])
+
+        self.assertTrue(matcher.is_ignored("target/app.jar"))
+        self.assertFalse(matcher.is_ignored("module/target/app.jar"))
+        self.assertTrue(matcher.is_ignored("docs/generated/index.html"))
+        self.assertTrue(matcher.is_ignored("docs/a/b/generated/index.html"))
+        self.assertFalse(matcher.is_ignored("other/docs/generated/index.html"))
+        self.assertTrue(matcher.is_ignored("logs/2024/app.log"))
+        self.assertTrue(matcher.is_ignored("src/file-1.c"))
+        self.assertFalse(matcher.is_ignored("src/file-12.c"))
+        self.assertEqual(["/target", "docs/**/generated", "logs/**", "file-?.[ch]"], matcher.patterns)
+
+    @patch('valhalla.commit.ignore.warn')
+    def test_negated_patterns_are_skipped(self, mock_warn: Mock):
+        matcher = IgnoreMatcher(["!keep.txt"])
+
+        self.assertFalse(matcher.is_ignored("keep.txt"))
+        mock_warn.assert_called_once_with("Negated ignore pattern !keep.txt is not supported, skipping it")
+
+
+if __name__ == '__main__':
+    unittest.main()
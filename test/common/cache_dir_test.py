@@ -0,0 +1,59 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from valhalla.common.cache_dir import load_entry, store_entry, get_entry_path, STALE_TMP_FILE_SECONDS
+
+
+@patch('valhalla.common.cache_dir.warn')
+class CacheDirTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "entries")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stored_entry_is_loaded(self, mock_warn):
+        # given:
+        entry_path = get_entry_path(self.cache_dir, "key")
+
+        # when:
+        store_entry(self.cache_dir, entry_path, {"value": 1})
+
+        # then:
+        self.assertEqual({"value": 1}, load_entry(entry_path))
+        self.assertEqual(["key.json"], os.listdir(self.cache_dir))
+        mock_warn.assert_not_called()
+
+    def test_failed_write_does_not_leave_tmp_file(self, mock_warn):
+        # given:
+        entry_path = get_entry_path(self.cache_dir, "key")
+
+        # when:
+        store_entry(self.cache_dir, entry_path, {"value": object()})
+
+        # then:
+        self.assertEqual([], os.listdir(self.cache_dir))
+        mock_warn.assert_called_once()
+
+    def test_eviction_removes_oldest_entries_and_stale_tmp_files(self, mock_warn):
+        # given:
+        os.makedirs(self.cache_dir)
+        stale_tmp = os.path.join(self.cache_dir, "interrupted.tmp")
+        open(stale_tmp, "w").close()
+        old = time.time() - STALE_TMP_FILE_SECONDS - 1
+        os.utime(stale_tmp, (old, old))
+        for i in range(3):
+            entry_path = get_entry_path(self.cache_dir, f"key{i}")
+            store_entry(self.cache_dir, entry_path, {"value": i})
+            os.utime(entry_path, (old + i, old + i))
+
+        # when:
+        store_entry(self.cache_dir, get_entry_path(self.cache_dir, "key3"), {"value": 3}, max_entries=2)
+
+        # then:
+        self.assertEqual(["key2.json", "key3.json"], sorted(os.listdir(self.cache_dir)))
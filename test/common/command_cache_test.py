@@ -0,0 +1,105 @@
+import os
+import stat
+from unittest.mock import patch, MagicMock
+
+from valhalla.common.command_cache import run_with_cache, get_cache_key
+from valhalla.common.executor import ExecutionResult
+from valhalla.common.get_config import CommandCacheConfig
+from test.cache_dir_test_case import CacheDirTestCase
+
+
+@patch('valhalla.common.command_cache.info')
+class CommandCacheTest(CacheDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.cache_root, "commands")
+        self.input_file = os.path.join(self.tmp.name, "pom.xml")
+        with open(self.input_file, "w") as f:
+            f.write("<version>1.0.0</version>")
+        self.env = patch.dict(os.environ, {"MAVEN_OPTS": "-Xmx1g"})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+
+    def test_without_cache_config_always_runs(self, mock_info):
+        # given:
+        run = MagicMock(return_value=ExecutionResult(0, "1.0.0", ""))
+
+        # when:
+        run_with_cache("mvn help:evaluate", None, run)
+        run_with_cache("mvn help:evaluate", None, run)
+
+        # then:
+        self.assertEqual(2, run.call_count)
+
+    def test_reuses_result_while_inputs_do_not_change(self, mock_info):
+        # given:
+        cache = CommandCacheConfig([os.path.join(self.tmp.name, "*.xml")], ["MAVEN_OPTS"])
+        run = MagicMock(return_value=ExecutionResult(0, "1.0.0", ""))
+
+        # when:
+        first = run_with_cache("mvn help:evaluate", cache, run)
+        second = run_with_cache("mvn help:evaluate", cache, run)
+
+        # then:
+        run.assert_called_once()
+        self.assertEqual(first, second)
+
+    def test_changed_file_or_env_invalidates_result(self, mock_info):
+        # given:
+        cache = CommandCacheConfig([self.input_file], ["MAVEN_OPTS"])
+        run = MagicMock(return_value=ExecutionResult(0, "1.0.0", ""))
+        run_with_cache("mvn help:evaluate", cache, run)
+
+        # when:
+        with open(self.input_file, "w") as f:
+            f.write("<version>2.0.0</version>")
+        run_with_cache("mvn help:evaluate", cache, run)
+        with patch.dict(os.environ, {"MAVEN_OPTS": "-Xmx2g"}):
+            run_with_cache("mvn help:evaluate", cache, run)
+
+        # then:
+        self.assertEqual(3, run.call_count)
+
+    def test_failed_result_is_not_stored(self, mock_info):
+        # given:
+        cache = CommandCacheConfig([self.input_file], [])
+        run = MagicMock(return_value=ExecutionResult(1, "", "error"))
+
+        # when:
+        run_with_cache("mvn help:evaluate", cache, run)
+        run_with_cache("mvn help:evaluate", cache, run)
+
+        # then:
+        self.assertEqual(2, run.call_count)
+
+    def test_least_recently_used_entries_are_evicted(self, mock_info):
+        # given:
+        cache = CommandCacheConfig([self.input_file], [])
+        run = MagicMock(return_value=ExecutionResult(0, "x" * 1000, ""))
+
+        # when:
+        with patch.dict(os.environ, {"VALHALLA_CACHE_MAX_BYTES": "2500"}):
+            for i in range(5):
+                run_with_cache(f"command {i}", cache, run)
+
+        # then:
+        entries = os.listdir(self.cache_dir)
+        self.assertEqual(2, len(entries))
+        self.assertIn(get_cache_key("command 4", cache) + ".json", entries)
+
+    def test_command_is_not_stored_in_private_cache_directory(self, mock_info):
+        # given:
+        cache = CommandCacheConfig([self.input_file], [])
+        run = MagicMock(return_value=ExecutionResult(0, "1.0.0", ""))
+
+        # when:
+        run_with_cache("curl -H 'PRIVATE-TOKEN: secret-token' https://example.com", cache, run)
+
+        # then:
+        [entry] = os.listdir(self.cache_dir)
+        with open(os.path.join(self.cache_dir, entry)) as f:
+            self.assertNotIn("secret-token", f.read())
+        self.assertEqual(0o700, stat.S_IMODE(os.stat(self.cache_dir).st_mode))
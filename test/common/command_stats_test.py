@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from valhalla.common.command_stats import CommandStats, record_command_stats, get_command_stats, clear_command_stats, \
+    phase, report_command_stats
+from valhalla.common.executor import Executor
+from valhalla.common.logger import init_logger
+
+
+class CommandStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        clear_command_stats()
+
+    def tearDown(self):
+        clear_command_stats()
+
+    @patch('valhalla.common.executor.info')
+    def test_executor_records_command_in_current_phase(self, mock_info):
+        # when:
+        with phase("commit_before_release"):
+            Executor.run("echo hello; echo oops >&2", check=False, stream=True)
+
+        # then:
+        stats = get_command_stats()
+        self.assertEqual(1, len(stats))
+        self.assertEqual("commit_before_release", stats[0].phase)
+        self.assertEqual(0, stats[0].returncode)
+        self.assertEqual(6, stats[0].stdout_bytes)
+        self.assertEqual(5, stats[0].stderr_bytes)
+        self.assertIsNotNone(stats[0].user_seconds)
+        self.assertGreater(stats[0].max_rss_kb, 0)
+
+    @patch('valhalla.common.executor.info')
+    def test_resource_usage_is_measured_only_per_process(self, mock_info):
+        # when:
+        Executor.run("echo with timeout", timeout=5)
+        Executor.run("echo without timeout")
+
+        # then:
+        with_timeout, without_timeout = get_command_stats()
+        self.assertGreater(with_timeout.max_rss_kb, 0)
+        self.assertIsNone(without_timeout.max_rss_kb)
+        self.assertIsNone(without_timeout.user_seconds)
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.common.executor.error')
+    def test_executor_kills_command_after_timeout(self, mock_error, mock_info):
+        # when:
+        result = Executor.run("sleep 10", check=False, stream=True, timeout=0.2)
+
+        # then:
+        self.assertNotEqual(0, result.returncode)
+        self.assertTrue(get_command_stats()[0].timed_out)
+        self.assertLess(get_command_stats()[0].wall_seconds, 5)
+        mock_error.assert_any_call("Command 'sleep 10' timed out after 0.2s and was killed")
+
+    @patch('valhalla.common.command_stats.info')
+    def test_report_is_sorted_by_wall_time_and_written_as_json(self, mock_info):
+        # given:
+        record_command_stats(CommandStats("fast", None, 0, 0.1, 0.0, 0.0, 1024, 1, 0))
+        record_command_stats(CommandStats("slow", "release", 1, 2.5, 1.0, 0.5, 2048, 10, 2))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.json")
+
+            # when:
+            report_command_stats(path)
+
+            # then:
+            with open(path) as f:
+                report = json.load(f)
+        self.assertEqual(["slow", "fast"], [c["command"] for c in report["commands"]])
+        self.assertEqual(2048, report["commands"][0]["max_rss_kb"])
+        table = mock_info.call_args_list[1][0][0]
+        self.assertLess(table.index("slow"), table.index("fast"))
+
+
+    @patch('valhalla.common.command_stats.info')
+    def test_report_is_not_written_to_working_tree_by_default(self, mock_info):
+        # given:
+        record_command_stats(CommandStats("fast", None, 0, 0.1, 0.0, 0.0, 1024, 1, 0))
+
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {}, clear=True):
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                # when:
+                report_command_stats()
+
+                # then:
+                self.assertEqual([], os.listdir(tmp))
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(2, mock_info.call_count)
+
+
+    @patch('valhalla.common.command_stats.info')
+    def test_secrets_are_not_written_to_report(self, mock_info):
+        # given:
+        with patch.dict(os.environ, {"SECRET_TOKEN": "very-secret-value"}):
+            init_logger("valhalla-token-value")
+        record_command_stats(CommandStats("echo very-secret-value valhalla-token-value", None, 0, 0.1, 0.0, 0.0,
+                                          1024, 1, 0))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.json")
+
+            # when:
+            report_command_stats(path)
+
+            # then:
+            with open(path) as f:
+                report = f.read()
+        init_logger("not_set")
+        self.assertNotIn("very-secret-value", report)
+        self.assertNotIn("valhalla-token-value", report)
+        self.assertIn("echo *****************", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from valhalla.common.config_cache import get_config_cache_key, load_cached_yml_dict, store_cached_yml_dict, \
+    is_config_cache_enabled, get_config_cache_dir, CONFIG_CACHE_MAX_ENTRIES
+from valhalla.common.get_config import get_config
+from valhalla.common.yaml_loader import load_yaml
+from test.cache_dir_test_case import CacheDirTestCase
+
+EXTENDED = "git_host: gitlab\nrelease: {}\nvariables:\n  BASE_VAR: base\n"
+
+
+def fake_get_from_url(url):
+    with open(url) as f:
+        return f.read()
+
+
+@patch('valhalla.common.config_cache.info')
+class ConfigCacheTest(CacheDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.get_from_url = patch('valhalla.extends.valhalla_extends.get_from_url', side_effect=fake_get_from_url)
+        self.get_from_url.start()
+        self.extended = os.path.join(self.tmp.name, "extended.yml")
+        with open(self.extended, "w") as f:
+            f.write(EXTENDED)
+        self.config = os.path.join(self.tmp.name, "valhalla.yml")
+        with open(self.config, "w") as f:
+            f.write(f"extends:\n  - {self.extended}\nvariables:\n  CHILD_VAR: child\n")
+
+    def tearDown(self):
+        self.get_from_url.stop()
+
+    def test_key_changes_with_config_content(self, mock_info):
+        # expect:
+        self.assertEqual(get_config_cache_key("a: 1"), get_config_cache_key("a: 1"))
+        self.assertNotEqual(get_config_cache_key("a: 1"), get_config_cache_key("a: 2"))
+
+    def test_second_load_does_not_parse_and_merge_again(self, mock_info):
+        # given:
+        first = get_config(self.config)
+
+        # when:
+        with patch('valhalla.common.get_config.load_yaml', side_effect=load_yaml) as mock_load_yaml, \
+                patch('valhalla.extends.valhalla_extends.load_yaml', side_effect=load_yaml) as mock_load_extended:
+            second = get_config(self.config)
+
+        # then:
+        mock_load_yaml.assert_not_called()
+        mock_load_extended.assert_not_called()
+        self.assertEqual(repr(first), repr(second))
+
+    def test_changed_extended_file_invalidates_cache(self, mock_info):
+        # given:
+        get_config(self.config)
+        with open(self.extended, "w") as f:
+            f.write(EXTENDED.replace("base", "changed"))
+
+        # when:
+        config = get_config(self.config)
+
+        # then:
+        self.assertEqual("changed", config.variables["BASE_VAR"])
+
+    def test_entries_are_stored_as_json(self, mock_info):
+        # when:
+        get_config(self.config)
+
+        # then:
+        [name] = os.listdir(get_config_cache_dir())
+        with open(os.path.join(get_config_cache_dir(), name)) as f:
+            entry = json.load(f)
+        self.assertEqual("child", entry["yml_dict"]["variables"]["CHILD_VAR"])
+
+    def test_config_with_values_not_supported_by_json_is_not_cached(self, mock_info):
+        # when:
+        store_cached_yml_dict("a: 2024-01-01", {}, load_yaml("a: 2024-01-01"))
+
+        # then:
+        self.assertIsNone(load_cached_yml_dict("a: 2024-01-01"))
+
+    def test_cache_can_be_disabled(self, mock_info):
+        with patch.dict(os.environ, {"VALHALLA_CONFIG_CACHE": "false"}):
+            self.assertFalse(is_config_cache_enabled())
+
+    def test_corrupted_entry_is_ignored(self, mock_info):
+        # given:
+        os.makedirs(get_config_cache_dir())
+        with open(os.path.join(get_config_cache_dir(), get_config_cache_key("a: 1") + ".json"), "w") as f:
+            f.write("not a json")
+
+        # when:
+        with patch('valhalla.common.cache_dir.warn') as mock_warn:
+            cached = load_cached_yml_dict("a: 1")
+
+        # then:
+        self.assertIsNone(cached)
+        mock_warn.assert_called_once()
+
+    def test_least_recently_used_entries_are_evicted(self, mock_info):
+        # when:
+        for i in range(CONFIG_CACHE_MAX_ENTRIES + 1):
+            store_cached_yml_dict(f"a: {i}", {}, {"a": i})
+            os.utime(os.path.join(get_config_cache_dir(), get_config_cache_key(f"a: {i}") + ".json"), (i, i))
+
+        store_cached_yml_dict("last: 1", {}, {"last": 1})
+
+        # then:
+        self.assertEqual(CONFIG_CACHE_MAX_ENTRIES, len(os.listdir(get_config_cache_dir())))
+        self.assertIsNone(load_cached_yml_dict("a: 0"))
+        self.assertIsNone(load_cached_yml_dict("a: 1"))
+        self.assertEqual({"a": 2}, load_cached_yml_dict("a: 2"))
+
+
+if __name__ == '__main__':
+    unittest.main()
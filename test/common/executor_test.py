@@ -1,8 +1,9 @@
 import subprocess
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 
-from valhalla.common.executor import Executor
+from valhalla.common.executor import Executor, ShellSession, ShellSessionError, ExecutionResult
 
 
 class ExecutorTest(unittest.TestCase):
@@ -47,3 +48,135 @@ class ExecutorTest(unittest.TestCase):
         
         # then:
         self.assertIsNone(result)
+
+    @patch('valhalla.common.executor.info')
+    def test_run_streaming_logs_lines_and_keeps_tail(self, mock_info):
+        # when:
+        result = Executor.run("for i in 1 2 3 4 5; do echo line$i; done", check=False, stream=True, tail_lines=2)
+
+        # then:
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, "line4\nline5\n")
+        mock_info.assert_any_call("line1")
+        mock_info.assert_any_call("line5")
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.common.executor.error')
+    def test_run_streaming_reports_error_output(self, mock_error, mock_info):
+        # when:
+        result = Executor.run("echo out; echo err >&2; exit 3", check=True, stream=True)
+
+        # then:
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout, "out\n")
+        self.assertEqual(result.stderr, "err\n")
+        mock_info.assert_any_call("[stderr] err")
+        mock_error.assert_called_once_with("Error executing command 'echo out; echo err >&2; exit 3': err\n")
+
+    @patch('valhalla.common.executor.info')
+    def test_run_in_session_shares_shell_state(self, mock_info):
+        # given:
+        session = ShellSession()
+
+        try:
+            # when:
+            Executor.run("cd /tmp && export VALHALLA_SESSION_TEST=value", check=False, stream=True, session=session)
+            result = Executor.run("pwd; echo $VALHALLA_SESSION_TEST; printf last", check=False, stream=True,
+                                  session=session)
+        finally:
+            session.close()
+
+        # then:
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, "/tmp\nvalue\nlast")
+        mock_info.assert_any_call("last")
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.common.executor.error')
+    def test_run_in_session_reports_exit_code_and_error_output(self, mock_error, mock_info):
+        # given:
+        session = ShellSession()
+
+        try:
+            # when:
+            failed = Executor.run("echo err >&2; false", check=False, stream=True, session=session)
+            syntax_error = Executor.run("if then", check=False, stream=True, session=session)
+            succeeded = Executor.run("echo ok", check=False, stream=True, session=session)
+        finally:
+            session.close()
+
+        # then:
+        self.assertEqual((failed.returncode, failed.stderr), (1, "err\n"))
+        self.assertEqual(syntax_error.returncode, 2)
+        self.assertEqual((succeeded.returncode, succeeded.stdout), (0, "ok\n"))
+
+    @patch('valhalla.common.executor.info')
+    def test_run_in_session_restarts_shell_after_exit(self, mock_info):
+        # given:
+        session = ShellSession()
+
+        try:
+            # when:
+            Executor.run("cd /tmp", check=False, stream=True, session=session)
+            exited = Executor.run("exit 7", check=False, stream=True, session=session)
+            result = Executor.run("pwd", check=False, stream=True, session=session)
+        finally:
+            session.close()
+
+        # then:
+        self.assertEqual(exited.returncode, 7)
+        self.assertEqual(result.returncode, 0)
+        self.assertNotEqual(result.stdout, "/tmp\n")
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.common.executor.warn')
+    def test_run_without_session_when_session_cannot_start(self, mock_warn, mock_info):
+        # given:
+        session = MagicMock()
+        session.execute.side_effect = ShellSessionError("Could not start shell session: boom")
+
+        # when:
+        result = Executor.run("echo fallback", check=False, stream=True, session=session)
+
+        # then:
+        self.assertEqual(result.stdout, "fallback\n")
+        mock_warn.assert_called_once_with("Could not start shell session: boom, executing command in new shell")
+
+    @patch('valhalla.common.executor.info')
+    @patch('valhalla.common.executor.error')
+    def test_run_with_timeout_kills_processes_started_by_command(self, mock_error, mock_info):
+        # when:
+        result = Executor.run("sleep 30 & echo $!; wait", check=False, timeout=0.5)
+
+        # then:
+        pid = int(result.stdout)
+        self.assertNotEqual(0, result.returncode)
+        self.assertTrue(wait_until_not_running(pid, 5), "process started by command is still running")
+        mock_error.assert_any_call("Command 'sleep 30 & echo $!; wait' timed out after 0.5s and was killed")
+
+    @patch('valhalla.common.executor.info')
+    def test_run_with_timeout_returns_output_of_finished_command(self, mock_info):
+        # when:
+        result = Executor.run("echo done", timeout=5)
+
+        # then:
+        self.assertEqual(ExecutionResult(0, "done\n", ""), result)
+
+
+def wait_until_not_running(pid: int, timeout: float) -> bool:
+    # output pipes are closed while process is exiting, so it can be still seen for a moment
+    deadline = time.monotonic() + timeout
+    while is_running(pid):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def is_running(pid: int) -> bool:
+    # killed process can stay as zombie until it is reaped by init
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(") ")[1][0] != "Z"
+    except FileNotFoundError:
+        return False
@@ -2,11 +2,13 @@ import unittest
 from unittest.mock import mock_open, patch
 
 from valhalla.common.get_config import get_config
+from test.cache_dir_test_case import CacheDirTestCase
 
 
-class GetConfigTest(unittest.TestCase):
+class GetConfigTest(CacheDirTestCase):
 
     def setUp(self):
+        super().setUp()
         self.config_path = "test_config.yml"
         self.mock_yml_content = """
         git_host: gitlab
@@ -1,7 +1,14 @@
 import unittest
 from unittest.mock import patch, call, MagicMock
 
-from valhalla.common.logger import info, warn, error, init_logger, init_logger_mr_hook
+from valhalla.common.logger import debug, info, warn, error, init_logger, init_logger_mr_hook
+
+
+def comments_only_mr_hook():
+    # hook of provider which cannot edit comments, every warning is a new comment
+    mr_hook = MagicMock()
+    mr_hook.supports_status.return_value = False
+    return mr_hook
 
 
 class LoggerTest(unittest.TestCase):
@@ -11,6 +18,7 @@ class LoggerTest(unittest.TestCase):
         logger.MR_HOOK = None
         logger.MR_HOOK_COMMENTS_COUNT = 0
         logger.PENDING_MR_COMMENTS = []
+        logger.LOG_LEVEL = logger.LOG_LEVELS["INFO"]
 
     @patch('builtins.print')
     def test_info(self, mock_print):
@@ -74,7 +82,7 @@ class LoggerTest(unittest.TestCase):
     @patch('builtins.print')
     def test_warn_adds_comment_to_mr_when_hook_is_set(self, mock_print):
         # given:
-        mr_hook = MagicMock()
+        mr_hook = comments_only_mr_hook()
         init_logger_mr_hook(mr_hook)
         msg = "warn message"
 
@@ -88,7 +96,7 @@ class LoggerTest(unittest.TestCase):
     @patch('builtins.print')
     def test_error_adds_comment_to_mr_when_hook_is_set(self, mock_print):
         # given:
-        mr_hook = MagicMock()
+        mr_hook = comments_only_mr_hook()
         init_logger_mr_hook(mr_hook)
         msg = "error message"
 
@@ -102,7 +110,7 @@ class LoggerTest(unittest.TestCase):
     @patch('builtins.print')
     def test_multiline_warn_adds_comment_with_proper_newlines(self, mock_print):
         # given:
-        mr_hook = MagicMock()
+        mr_hook = comments_only_mr_hook()
         init_logger_mr_hook(mr_hook)
         msg = "line1\nline2"
 
@@ -117,7 +125,7 @@ class LoggerTest(unittest.TestCase):
     def test_no_comment_when_hook_not_set(self, mock_print):
         # given:
         init_logger_mr_hook(None)
-        mr_hook = MagicMock()  # this one is not registered
+        mr_hook = comments_only_mr_hook()  # this one is not registered
         msg = "error message"
 
         # when:
@@ -132,7 +140,7 @@ class LoggerTest(unittest.TestCase):
     def test_exit_after_50_comments(self, mock_exit, mock_print):
         # given:
         from valhalla.common import logger
-        mr_hook = MagicMock()
+        mr_hook = comments_only_mr_hook()
         init_logger_mr_hook(mr_hook)
         logger.MR_HOOK_COMMENTS_COUNT = 0  # reset count for test
         
@@ -161,7 +169,7 @@ class LoggerTest(unittest.TestCase):
         error("early error")
 
         # when: MR hook is initialized later
-        mr_hook = MagicMock()
+        mr_hook = comments_only_mr_hook()
         init_logger_mr_hook(mr_hook)
 
         # then: pending comments are flushed in order
@@ -173,12 +181,12 @@ class LoggerTest(unittest.TestCase):
     def test_pending_buffer_cleared_after_flush(self, mock_print):
         # given: an early error and a hook set up
         error("early error")
-        mr_hook = MagicMock()
+        mr_hook = comments_only_mr_hook()
         init_logger_mr_hook(mr_hook)
 
         # when: a new hook is set up afterwards
         mr_hook.reset_mock()
-        another_hook = MagicMock()
+        another_hook = comments_only_mr_hook()
         init_logger_mr_hook(another_hook)
 
         # then: previously flushed comments are not re-flushed
@@ -190,7 +198,7 @@ class LoggerTest(unittest.TestCase):
         info("informational")
 
         # when: MR hook is initialized later
-        mr_hook = MagicMock()
+        mr_hook = comments_only_mr_hook()
         init_logger_mr_hook(mr_hook)
 
         # then: info messages are never sent to MR
@@ -208,3 +216,98 @@ class LoggerTest(unittest.TestCase):
 
         # then:
         mock_print.assert_called_once_with("[INFO] Author is John Doe")
+
+    @patch('builtins.print')
+    def test_debug_not_printed_by_default(self, mock_print):
+        # when:
+        debug("debug message")
+
+        # then:
+        mock_print.assert_not_called()
+
+    @patch('builtins.print')
+    def test_log_level_filters_lower_levels(self, mock_print):
+        # given:
+        from valhalla.common import logger
+        logger.LOG_LEVEL = logger.LOG_LEVELS["WARN"]
+        mr_hook = comments_only_mr_hook()
+        init_logger_mr_hook(mr_hook)
+
+        # when:
+        info("info message")
+        warn("warn message")
+
+        # then:
+        mock_print.assert_called_once_with("[WARN] warn message")
+        mr_hook.add_comment.assert_called_once_with("[WARN] warn message")
+
+    @patch('builtins.print')
+    def test_log_level_does_not_filter_warnings_delivered_to_mr(self, mock_print):
+        # given:
+        from valhalla.common import logger
+        logger.LOG_LEVEL = logger.LOG_LEVELS["ERROR"]
+        mr_hook = comments_only_mr_hook()
+        init_logger_mr_hook(mr_hook)
+
+        # when:
+        warn("warn message")
+
+        # then:
+        mock_print.assert_not_called()
+        mr_hook.add_comment.assert_called_once_with("[WARN] warn message")
+
+    @patch('builtins.print')
+    @patch('valhalla.common.resolver.resolve')
+    def test_message_without_placeholders_and_token_is_not_resolved(self, mock_resolve, mock_print):
+        # given:
+        init_logger("secret_token_123")
+
+        # when:
+        info("plain message")
+
+        # then:
+        mock_resolve.assert_not_called()
+        mock_print.assert_called_once_with("[INFO] plain message")
+
+    @patch('builtins.print')
+    @patch.dict('os.environ', {"CI_REGISTRY_PASSWORD": "registry-pass"})
+    def test_logger_hides_secrets_from_env(self, mock_print):
+        # given:
+        init_logger("secret_token_123")
+
+        # when:
+        info("Password is registry-pass")
+
+        # then:
+        mock_print.assert_called_once_with("[INFO] Password is *************")
+
+    @patch('builtins.print')
+    def test_background_delivery_joins_warnings_and_flushes_on_error(self, mock_print):
+        # given:
+        from valhalla.common import logger
+        logger.PENDING_MR_COMMENTS = []
+        mr_hook = comments_only_mr_hook()
+        init_logger_mr_hook(mr_hook, background=True)
+
+        # when:
+        warn("warn message")
+        error("error message")
+
+        # then:
+        mr_hook.add_comment.assert_called_once_with("[WARN] warn message  \n[ERROR] error message")
+        logger.close_logger_mr_hook()
+
+    @patch('builtins.print')
+    def test_warn_goes_to_status_summary_when_hook_supports_status(self, mock_print):
+        # given:
+        mr_hook = MagicMock()
+        mr_hook.supports_status.return_value = True
+        init_logger_mr_hook(mr_hook)
+
+        # when:
+        warn("warn message")
+        error("error message")
+
+        # then:
+        mr_hook.add_status_warning.assert_called_once_with("[WARN] warn message")
+        mr_hook.add_comment.assert_called_once_with("[ERROR] error message")
@@ -2,9 +2,13 @@ import unittest
 from unittest.mock import mock_open, patch
 
 from valhalla.common.get_config import get_config
+from test.cache_dir_test_case import CacheDirTestCase
 
 
-class ReleaseAssetsLinksParsingTest(unittest.TestCase):
+class ReleaseAssetsLinksParsingTest(CacheDirTestCase):
+
+    def setUp(self):
+        super().setUp()
 
     @patch(
         'builtins.open',
@@ -89,3 +89,59 @@ class TestStringResolver(unittest.TestCase):
 
         # then:
         self.assertEqual("some string {VERSION}", resolved_string)
+
+    @patch.dict(os.environ, {"VERSION": "env_version", "SHARED": "env_shared", "ONLY_ENV": "env_only"})
+    def test_resolve_hierarchy(self):
+        # given:
+        resolver.init_str_resolver("token123", "kot")
+        resolver.init_str_resolver_set_version("2.0.0")
+        resolver.init_str_resolver_custom_variables({"VERSION": "custom_version", "SHARED": "custom_shared"})
+
+        # when:
+        resolved_string = resolver.resolve("{VERSION} {SHARED} {ONLY_ENV} {UNKNOWN_VAR} {}")
+
+        # then:
+        self.assertEqual("2.0.0 custom_shared env_only {UNKNOWN_VAR} {}", resolved_string)
+
+    @patch.dict(os.environ, {"CI_PROJECT_PATH": "group/app"})
+    def test_resolve_env_variables_inside_custom_variables(self):
+        # given:
+        resolver.init_str_resolver("token123", "kot")
+        resolver.init_str_resolver_custom_variables({"IMAGE": "registry/{CI_PROJECT_PATH}:x"})
+
+        # when:
+        resolved_string = resolver.resolve("{IMAGE}")
+
+        # then:
+        self.assertEqual("registry/group/app:x", resolved_string)
+
+    def test_resolve_uses_cache_for_repeated_strings(self):
+        # given:
+        resolver.init_str_resolver("token123", "kot")
+        resolver.init_str_resolver_set_version("1.0")
+
+        # when:
+        resolver.resolve("Cached {VERSION}", suppress_log=True)
+        resolved_string = resolver.resolve("Cached {VERSION}", suppress_log=True)
+
+        # then:
+        self.assertEqual("Cached 1.0", resolved_string)
+        cache_info = resolver.get_resolve_cache_info()
+        self.assertEqual(1, cache_info.hits)
+        self.assertEqual(1, cache_info.misses)
+
+    def test_resolve_cache_cleared_when_state_changes(self):
+        # given:
+        resolver.init_str_resolver("token123", "kot")
+        resolver.init_str_resolver_set_version("1.0")
+        resolver.resolve("Cached {VERSION} {CACHE_VAR}")
+
+        # when:
+        resolver.init_str_resolver_set_version("2.0")
+        resolved_version = resolver.resolve("Cached {VERSION} {CACHE_VAR}")
+        resolver.init_str_resolver_custom_variables({"CACHE_VAR": "custom"})
+        resolved_custom = resolver.resolve("Cached {VERSION} {CACHE_VAR}")
+
+        # then:
+        self.assertEqual("Cached 2.0 {CACHE_VAR}", resolved_version)
+        self.assertEqual("Cached 2.0 custom", resolved_custom)
@@ -0,0 +1,64 @@
+import importlib
+import unittest
+from unittest.mock import patch
+
+import yaml
+
+import valhalla.common.yaml_loader as yaml_loader
+from valhalla.common.yaml_loader import load_yaml
+
+CONFIG = """
+git_host: gitlab
+variables:
+  VERSION_FILE: "pom.xml"
+  ENABLED: true
+  COUNT: 3
+commit_before_release:
+  enabled: True
+  before:
+    - id: build
+      command: "mvn package"
+      needs: []
+release:
+  description:
+    from_command: "cat changelog-{VERSION}.md"
+  assets:
+    links:
+      - name: jar
+        url: https://example.com/app-{VERSION}.jar
+"""
+
+
+class YamlLoaderTest(unittest.TestCase):
+
+    def test_load_yaml_returns_same_result_as_safe_load(self):
+        # when:
+        result = load_yaml(CONFIG)
+
+        # then:
+        self.assertEqual(yaml.safe_load(CONFIG), result)
+
+    def test_load_yaml_does_not_construct_python_objects(self):
+        # expect:
+        with self.assertRaises(yaml.constructor.ConstructorError):
+            load_yaml("!!python/object/apply:os.system ['echo unsafe']")
+
+    def test_falls_back_to_python_loader_without_libyaml(self):
+        # given: PyYAML built without libyaml does not provide CSafeLoader
+        with patch.object(yaml, "CSafeLoader", create=True):
+            del yaml.CSafeLoader
+            reloaded = importlib.reload(yaml_loader)
+
+            # when:
+            result = reloaded.load_yaml(CONFIG)
+
+            # then:
+            self.assertFalse(reloaded.is_libyaml_loader())
+            self.assertIs(yaml.SafeLoader, reloaded.YAML_LOADER)
+            self.assertEqual(yaml.safe_load(CONFIG), result)
+
+        importlib.reload(yaml_loader)
+
+
+if __name__ == '__main__':
+    unittest.main()
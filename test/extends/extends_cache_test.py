@@ -0,0 +1,43 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from valhalla.extends.extends_cache import ExtendsCacheEntry, store_extends_entry, load_extends_entry, \
+    get_extends_cache_dir
+from test.cache_dir_test_case import CacheDirTestCase
+
+
+class ExtendsCacheTest(CacheDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.env = patch.dict(os.environ, {"VALHALLA_EXTENDS_CACHE_MAX_BYTES": "1000"})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+
+    def test_stored_entry_is_loaded(self):
+        # given:
+        store_extends_entry("key", ExtendsCacheEntry("http://example.com/{TOKEN}", "base: 1", '"v1"', None, 10.0))
+
+        # when:
+        entry = load_extends_entry("key")
+
+        # then:
+        self.assertEqual("http://example.com/{TOKEN}", entry.url)
+        self.assertEqual("base: 1", entry.body)
+        self.assertEqual({"If-None-Match": '"v1"'}, entry.conditional_headers())
+
+    def test_least_recently_used_entries_are_evicted_above_max_bytes(self):
+        # when:
+        for i in range(5):
+            store_extends_entry(f"key-{i}", ExtendsCacheEntry("url", "x" * 300, None, None, 10.0))
+            os.utime(os.path.join(get_extends_cache_dir(), f"key-{i}.json"), (i, i))
+
+        # then:
+        self.assertEqual(["key-3.json", "key-4.json"], sorted(os.listdir(get_extends_cache_dir())))
+
+
+if __name__ == '__main__':
+    unittest.main()
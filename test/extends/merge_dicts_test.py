@@ -83,3 +83,70 @@ class MergeDictsTest(unittest.TestCase):
 
         self.assertEqual(result['merge_request']['title'], 'child title')
         self.assertEqual(result['merge_request']['description'], 'parent description')
+
+    def test_merge_does_not_modify_inputs_and_does_not_share_them(self):
+        # given:
+        parent = {"a": {"b": [1, 2]}, "c": {"d": 1}}
+        child = {"a": {"e": {"f": 1}}}
+
+        # when:
+        result = merge(parent, child)
+
+        # then:
+        self.assertEqual({"a": {"b": [1, 2], "e": {"f": 1}}, "c": {"d": 1}}, result)
+        self.assertEqual({"a": {"b": [1, 2]}, "c": {"d": 1}}, parent)
+        self.assertIsNot(parent["c"], result["c"])
+        self.assertIsNot(child["a"]["e"], result["a"]["e"])
+
+    def test_merge_with_share_reuses_untouched_subtrees(self):
+        # given:
+        parent = {"a": {"b": 1}, "c": {"d": 1}}
+        child = {"a": {"b": 2}, "e": {"f": 1}}
+
+        # when:
+        result = merge(parent, child, share=True)
+
+        # then:
+        self.assertEqual({"a": {"b": 2}, "c": {"d": 1}, "e": {"f": 1}}, result)
+        self.assertIs(parent["c"], result["c"])
+        self.assertIs(child["e"], result["e"])
+        self.assertEqual({"b": 1}, parent["a"])
+
+    def test_merge_lists_with_append_strategy(self):
+        # when:
+        result = merge({"before": ["parent"]}, {"before": ["child"]}, list_strategy="append")
+
+        # then:
+        self.assertEqual(["parent", "child"], result["before"])
+
+    def test_merge_lists_by_key(self):
+        # given:
+        parent = {"before": [{"id": "build", "command": "mvn package", "needs": []},
+                             {"id": "test", "command": "mvn test"},
+                             "echo parent"]}
+        child = {"before": [{"id": "deploy", "command": "mvn deploy"},
+                            {"id": "build", "command": "mvn -q package"},
+                            "echo child"]}
+
+        # when:
+        result = merge(parent, child, list_strategy="merge_by_key")
+
+        # then:
+        self.assertEqual([{"id": "build", "command": "mvn -q package", "needs": []},
+                          {"id": "test", "command": "mvn test"},
+                          "echo parent",
+                          {"id": "deploy", "command": "mvn deploy"},
+                          "echo child"], result["before"])
+
+    def test_merge_lists_by_custom_key(self):
+        # when:
+        result = merge({"links": [{"name": "jar", "url": "a"}]}, {"links": [{"name": "jar", "url": "b"}]},
+                       list_strategy="merge_by_key", list_key="name")
+
+        # then:
+        self.assertEqual([{"name": "jar", "url": "b"}], result["links"])
+
+    def test_unknown_list_strategy(self):
+        # expect:
+        with self.assertRaises(ValueError):
+            merge({}, {}, list_strategy="prepend")
@@ -1,18 +1,32 @@
+import os
+import threading
 import unittest
 from unittest.mock import patch, Mock
 
-from valhalla.extends.valhalla_extends import get_from_url
+import requests
 
+from valhalla.extends.valhalla_extends import get_from_url, ValhallaExtends
+from test.cache_dir_test_case import CacheDirTestCase
 
-class TestGetFromUrl(unittest.TestCase):
+
+def response(status_code, text="", headers=None):
+    mock_response = Mock()
+    mock_response.status_code = status_code
+    mock_response.text = text
+    mock_response.headers = headers or {}
+    mock_response.iter_content.return_value = [text.encode("utf-8")]
+    return mock_response
+
+
+class TestGetFromUrl(CacheDirTestCase):
+
+    def setUp(self):
+        super().setUp()
 
     @patch('requests.get')
     def test_get_from_url_success(self, mock_get):
         # given:
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.text = "Success"
-        mock_get.return_value = mock_response
+        mock_get.return_value = response(200, "Success")
 
         # when:
         result = get_from_url('http://example.com')
@@ -24,13 +38,244 @@ class TestGetFromUrl(unittest.TestCase):
     @patch('valhalla.extends.valhalla_extends.exit')
     def test_get_from_url_failure(self, mock_exit, mock_get):
         # given:
-        mock_response = Mock()
-        mock_response.status_code = 404
-        mock_response.text = "Not Found"
-        mock_get.return_value = mock_response
+        mock_get.return_value = response(404, "Not Found")
 
         # when:
         get_from_url('http://example.com')
 
         # then:
         mock_exit.assert_called_with(1)
+
+    @patch('requests.get')
+    def test_revalidates_cached_file_with_etag(self, mock_get):
+        # given:
+        mock_get.side_effect = [response(200, "base: 1", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024"}),
+                                response(304)]
+        get_from_url('http://example.com/base.yml')
+
+        # when:
+        result = get_from_url('http://example.com/base.yml')
+
+        # then: body is not transferred again
+        self.assertEqual("base: 1", result)
+        self.assertEqual({"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024"},
+                         mock_get.call_args.kwargs["headers"])
+
+    @patch('requests.get')
+    def test_changed_file_replaces_cached_one(self, mock_get):
+        # given:
+        mock_get.side_effect = [response(200, "base: 1", {"ETag": '"v1"'}), response(200, "base: 2", {"ETag": '"v2"'}),
+                                response(304)]
+        get_from_url('http://example.com/base.yml')
+
+        # when:
+        changed = get_from_url('http://example.com/base.yml')
+        cached = get_from_url('http://example.com/base.yml')
+
+        # then:
+        self.assertEqual("base: 2", changed)
+        self.assertEqual("base: 2", cached)
+        self.assertEqual({"If-None-Match": '"v2"'}, mock_get.call_args.kwargs["headers"])
+
+    @patch('requests.get')
+    def test_fresh_cached_file_is_used_without_request(self, mock_get):
+        # given:
+        mock_get.return_value = response(200, "base: 1")
+        get_from_url('http://example.com/base.yml')
+
+        # when:
+        with patch.dict(os.environ, {"VALHALLA_EXTENDS_MAX_AGE": "3600"}):
+            result = get_from_url('http://example.com/base.yml')
+
+        # then:
+        self.assertEqual("base: 1", result)
+        self.assertEqual(1, mock_get.call_count)
+
+    @patch('requests.get')
+    @patch('valhalla.extends.valhalla_extends.warn')
+    def test_offline_mode_uses_stale_file_when_server_is_unreachable(self, mock_warn, mock_get):
+        # given:
+        mock_get.side_effect = [response(200, "base: 1"), requests.exceptions.ConnectionError("unreachable")]
+        get_from_url('http://example.com/base.yml')
+
+        # when:
+        with patch.dict(os.environ, {"VALHALLA_EXTENDS_OFFLINE": "true"}):
+            result = get_from_url('http://example.com/base.yml')
+
+        # then:
+        self.assertEqual("base: 1", result)
+        mock_warn.assert_called_once()
+
+    @patch('requests.get')
+    @patch('valhalla.extends.valhalla_extends.exit')
+    def test_without_offline_mode_unreachable_server_fails(self, mock_exit, mock_get):
+        # given:
+        mock_get.side_effect = [response(200, "base: 1"), requests.exceptions.ConnectionError("unreachable")]
+        get_from_url('http://example.com/base.yml')
+
+        # when:
+        get_from_url('http://example.com/base.yml')
+
+        # then:
+        mock_exit.assert_called_with(1)
+
+
+    @patch('requests.get')
+    @patch('valhalla.extends.valhalla_extends.debug')
+    @patch('valhalla.extends.valhalla_extends.info')
+    def test_downloads_in_stream_and_logs_only_summary(self, mock_info, mock_debug, mock_get):
+        # given:
+        mock_get.return_value = response(200, "base: 1")
+        mock_get.return_value.iter_content.return_value = [b"ba", b"se", b": 1"]
+
+        # when:
+        result = get_from_url('http://example.com/base.yml')
+
+        # then:
+        self.assertEqual("base: 1", result)
+        self.assertTrue(mock_get.call_args.kwargs["stream"])
+        self.assertEqual(30, mock_get.call_args.kwargs["timeout"])
+        mock_info.assert_any_call("Loaded from URL: http://example.com/base.yml (7 bytes, sha256: "
+                                  "635ff5962e156d61f0b736e2327c48599bcfdaf599d872228ad12aff216527ce)")
+        mock_debug.assert_called_once_with("base: 1")
+        mock_get.return_value.close.assert_called_once()
+
+    @patch('requests.get')
+    @patch('valhalla.extends.valhalla_extends.exit')
+    def test_too_large_file_is_rejected(self, mock_exit, mock_get):
+        # given:
+        mock_get.return_value = response(200)
+        mock_get.return_value.iter_content.return_value = [b"x" * 600, b"x" * 600]
+
+        # when:
+        with patch.dict(os.environ, {"VALHALLA_EXTENDS_MAX_BYTES": "1000"}):
+            result = get_from_url('http://example.com/base.yml')
+
+        # then:
+        self.assertIsNone(result)
+        mock_exit.assert_called_with(1)
+
+    @patch('requests.get')
+    @patch('valhalla.extends.valhalla_extends.exit')
+    def test_too_large_content_length_is_rejected_before_download(self, mock_exit, mock_get):
+        # given:
+        mock_get.return_value = response(200, headers={"Content-Length": "2000"})
+
+        # when:
+        with patch.dict(os.environ, {"VALHALLA_EXTENDS_MAX_BYTES": "1000"}):
+            get_from_url('http://example.com/base.yml')
+
+        # then:
+        mock_exit.assert_called_with(1)
+        mock_get.return_value.iter_content.assert_not_called()
+
+FILES = {
+    "org": "variables:\n  LEVEL: org\n  ORG: org\ngit_host: gitlab\n",
+    "team": "extends:\n  - org\nvariables:\n  LEVEL: team\n  TEAM: team\n",
+    "java": "extends:\n  - org\nvariables:\n  LEVEL: java\n  JAVA: java\n",
+}
+
+
+class ValhallaExtendsTest(unittest.TestCase):
+
+    def get_from_url(self, url):
+        return self.files[url]
+
+    def setUp(self):
+        self.files = dict(FILES)
+        self.patcher = patch('valhalla.extends.valhalla_extends.get_from_url', side_effect=self.get_from_url)
+        self.mock_get_from_url = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_merges_nested_extends_in_declared_order(self):
+        # given:
+        extends = ValhallaExtends(["team", "java"])
+
+        # when:
+        result = extends.merge({"extends": ["team", "java"], "variables": {"CHILD": "child"}})
+
+        # then: the last declared file and then valhalla.yml have the highest priority
+        self.assertEqual({"LEVEL": "java", "ORG": "org", "TEAM": "team", "JAVA": "java", "CHILD": "child"},
+                         result["variables"])
+        self.assertEqual("gitlab", result["git_host"])
+        self.assertEqual(["team", "java"], result["extends"])
+
+    @patch('valhalla.extends.valhalla_extends.info')
+    def test_content_of_extended_files_is_not_logged_at_info_level(self, mock_info):
+        # when:
+        ValhallaExtends(["team"]).merge({"variables": {"CHILD": "child"}})
+
+        # then:
+        logged = "\n".join(str(c.args[0]) for c in mock_info.call_args_list)
+        self.assertNotIn("ORG", logged)
+        self.assertNotIn("CHILD", logged)
+
+    def test_fetches_every_url_once(self):
+        # when:
+        contents = ValhallaExtends(["team", "java", "org"]).load()
+
+        # then:
+        self.assertEqual(3, self.mock_get_from_url.call_count)
+        self.assertEqual({"org": FILES["org"], "team": FILES["team"], "java": FILES["java"]}, contents)
+
+    def test_fetches_files_of_the_same_level_concurrently(self):
+        # given: both files are downloaded only when the other one is being downloaded at the same time
+        barrier = threading.Barrier(2, timeout=5)
+
+        def get_from_url(url):
+            if url in ("team", "java"):
+                barrier.wait()
+            return self.files[url]
+
+        self.mock_get_from_url.side_effect = get_from_url
+
+        # when:
+        contents = ValhallaExtends(["team", "java"]).load()
+
+        # then:
+        self.assertEqual(3, len(contents))
+
+    def test_nothing_to_extend(self):
+        # when:
+        result = ValhallaExtends(None).merge({"git_host": "gitlab"})
+
+        # then:
+        self.assertEqual({"git_host": "gitlab"}, result)
+        self.mock_get_from_url.assert_not_called()
+
+    @patch('valhalla.extends.valhalla_extends.error')
+    def test_detects_cycle(self, mock_error):
+        # given:
+        self.files["org"] = "extends:\n  - java\n"
+
+        # when:
+        with self.assertRaises(SystemExit):
+            ValhallaExtends(["team"]).load()
+
+        # then:
+        mock_error.assert_called_once_with("Cycle in extends: org -> java -> org")
+
+    @patch('valhalla.extends.valhalla_extends.error')
+    def test_rejects_extended_file_which_is_not_mapping(self, mock_error):
+        # given:
+        self.files["org"] = "- just\n- a list\n"
+
+        # when:
+        with self.assertRaises(SystemExit):
+            ValhallaExtends(["team"]).load()
+
+        # then:
+        mock_error.assert_called_once_with("Extended file org must contain YAML mapping, not list")
+
+    def test_merges_lists_with_configured_strategy(self):
+        # given:
+        self.files["org"] = "before:\n  - id: build\n    command: mvn package\n"
+
+        # when:
+        result = ValhallaExtends(["org"], "merge_by_key").merge(
+            {"before": [{"id": "build", "command": "mvn -q package"}, {"id": "deploy"}]})
+
+        # then:
+        self.assertEqual([{"id": "build", "command": "mvn -q package"}, {"id": "deploy"}], result["before"])
@@ -1,10 +1,16 @@
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
+# caches must not be written to cache of user running tests
+CACHE_DIR = tempfile.TemporaryDirectory()
+
 
 def fake_environ_get(key, default=None):
     if key == "GITLAB_CI":
         return "true"
+    if key == "VALHALLA_CACHE_DIR":
+        return CACHE_DIR.name
     return ""
 
 
@@ -16,15 +22,23 @@ class MainStartTest(unittest.TestCase):
         mock_vtr.is_version_empty.return_value = False
         mock_vtr.get_config_file_path.return_value = "test/resources/valhalla.yml"
         mock_vtr.version_number_to_release = "1.2.3"
+        mock_vtr.other_components = []
 
         # mock requests.get used by ValhallaExtends to return local extended file content
-        def _mock_requests_get(url):
+        def _mock_requests_get(url, **kwargs):
             class R:
                 status_code = 200
+                headers = {}
 
                 def __init__(self, text):
                     self.text = text
 
+                def iter_content(self, chunk_size):
+                    return [self.text.encode("utf-8")]
+
+                def close(self):
+                    pass
+
             with open("test/resources/valhalla-extended.yml", "r") as f:
                 return R(f.read())
 
@@ -54,6 +68,64 @@ class MainStartTest(unittest.TestCase):
             # merge request config is default and disabled in our test YAML
             self.assertEqual(mock_create_mr.call_count, 1)
 
+    def test_deferred_push_prepares_release_before_commit_after_release_and_creates_it_after_push(self):
+        # given:
+        from valhalla.main import release_with_deferred_push
+        config = MagicMock()
+        config.tag_config = None
+        calls = MagicMock()
+        git = calls.git
+        git_host = MagicMock()
+        git_host.get_release_impl.return_value.return_value = calls.release
+
+        with patch('valhalla.main.commit', side_effect=lambda c, token, push: calls.commit(c, token, push)), \
+                patch('valhalla.main.GitRepository', return_value=git), \
+                patch('valhalla.main.prepare_release',
+                      side_effect=lambda *args: (calls.prepare_release(*args), {"tag_name": "1.2.3"})[1]):
+            # when:
+            release_with_deferred_push(git_host, config, "1.2.3", "TOKEN", MagicMock())
+
+        # then: description is resolved before commit_after_release changes files, release is created after push
+        self.assertEqual(["commit", "git.tag", "prepare_release", "commit", "git.push", "git.close", "release.create"],
+                         [c[0] for c in calls.mock_calls])
+        git.tag.assert_called_once_with("1.2.3")
+        git.push.assert_called_once_with("TOKEN", tags=["1.2.3"], atomic=True)
+        calls.prepare_release.assert_called_once_with(config, "1.2.3", "1.2.3")
+        calls.release.create.assert_called_once_with(tag_name="1.2.3")
+        calls.commit.assert_any_call(config.commit_before_release, "TOKEN", False)
+        calls.commit.assert_any_call(config.commit_after_release, "TOKEN", False)
+
+    def test_release_components_pushes_once_and_creates_all_releases(self):
+        # given:
+        from valhalla.main import release_components
+        from valhalla.version.version_to_release import VersionToRelease, ReleaseKind
+        api = VersionToRelease("1.2.0", ReleaseKind("valhalla-api.yml", "-api", "api"))
+        web = VersionToRelease("3.4.1", ReleaseKind("valhalla-web.yml", "-web", "web"))
+        api.other_components = [web]
+        api_config, web_config = MagicMock(variables={}), MagicMock(variables={})
+        api_config.tag_config.name = "api-{VERSION}"
+        web_config.tag_config.name = "web-{VERSION}"
+        git = MagicMock()
+        git_host = MagicMock()
+        release_impl = git_host.get_release_impl.return_value.return_value
+
+        with patch('valhalla.main.get_config', return_value=web_config), \
+                patch('valhalla.main.commit') as mock_commit, \
+                patch('valhalla.main.GitRepository', return_value=git), \
+                patch('valhalla.main.init_str_resolver_set_version'), \
+                patch('valhalla.main.prepare_release', side_effect=lambda c, v, t: {"tag_name": t}), \
+                patch('valhalla.main.resolve', side_effect=lambda s: s.replace("{VERSION}", "v")):
+            # when:
+            release_components(git_host, api_config, api, "TOKEN", MagicMock())
+
+        # then:
+        self.assertEqual(4, mock_commit.call_count)
+        self.assertTrue(all(c.kwargs["push"] is False for c in mock_commit.call_args_list))
+        git.push.assert_called_once_with("TOKEN", tags=["api-v", "web-v"], atomic=True)
+        git.close.assert_called_once()
+        self.assertEqual(1, git_host.get_release_impl.return_value.call_count)
+        self.assertEqual({"api-v", "web-v"}, {c.kwargs["tag_name"] for c in release_impl.create.call_args_list})
+
     def test_start_creates_mr_and_posts_error_when_version_empty(self):
         # given: version is empty and from_config does not resolve it (e.g. command failed)
         mock_vtr = MagicMock()
@@ -62,13 +134,20 @@ class MainStartTest(unittest.TestCase):
 
         provider_hook = MagicMock()
 
-        def _mock_requests_get(url):
+        def _mock_requests_get(url, **kwargs):
             class R:
                 status_code = 200
+                headers = {}
 
                 def __init__(self, text):
                     self.text = text
 
+                def iter_content(self, chunk_size):
+                    return [self.text.encode("utf-8")]
+
+                def close(self):
+                    pass
+
             with open("test/resources/valhalla-extended.yml", "r") as f:
                 return R(f.read())
 
@@ -53,5 +53,23 @@ class AssetsGetFilesTest(unittest.TestCase):
         self.assertEqual([], result)
 
 
+    @patch("valhalla.release.assets.resolve", side_effect=lambda x: x)
+    @patch("valhalla.release.assets.os.path.isfile", return_value=True)
+    @patch("valhalla.release.assets.glob.glob")
+    def test_get_files_expands_patterns_once(self, mock_glob, mock_isfile, mock_resolve):
+        # given
+        assets = Assets(ReleaseAssetsConfig(links=[], files=["dist/*.zip"]))
+        mock_glob.return_value = ["dist/a.zip"]
+        assets.get_files()
+        mock_glob.return_value = []
+
+        # when
+        result = assets.get_files()
+
+        # then
+        self.assertEqual(["dist/a.zip"], result)
+        mock_glob.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main()
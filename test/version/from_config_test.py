@@ -6,8 +6,9 @@ from valhalla.version.version_to_release import VersionToRelease, ReleaseKind
 
 class _VersionConfig:
     """Stub for VersionConfig used in tests."""
-    def __init__(self, from_command=None):
+    def __init__(self, from_command=None, cache=None):
         self.from_command = from_command
+        self.cache = cache
 
 
 class _Cfg:
@@ -1,8 +1,19 @@
 import os
+import subprocess
+import tempfile
 import unittest
 from unittest.mock import patch
 
-from valhalla.version.version_to_release import get_release_kinds
+from valhalla.version.version_to_release import get_release_kinds, clear_release_kinds_cache, ReleaseKind, \
+    ReleaseKindMatcher, get_version_to_release_from_str
+
+
+def create_files(root: str, files: list):
+    for file in files:
+        path = os.path.join(root, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("git_host: gitlab\n")
 
 
 class GetValhallaReleaseKindsTest(unittest.TestCase):
@@ -37,3 +48,129 @@ class GetValhallaReleaseKindsTest(unittest.TestCase):
         path = os.path.dirname(os.path.abspath(__file__)) + "/resources/empty"
         result = get_release_kinds(path)
         mock_exit.assert_called_with(-1)
+
+
+class GetValhallaReleaseKindsDiscoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        clear_release_kinds_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = self.tmp.name
+        create_files(self.path, ["valhalla.yml", "api/valhalla-api.yml", "api/deep/nested/valhalla-nested.yml",
+                                 "node_modules/pkg/valhalla.yml", ".git/valhalla.yml", "target/valhalla-copy.yml"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        clear_release_kinds_cache()
+
+    def kinds(self, **env):
+        with patch.dict(os.environ, env):
+            return [(kind.filename, kind.path) for kind in get_release_kinds(self.path)]
+
+    def test_heavy_directories_are_pruned_and_paths_point_to_directory_of_file(self):
+        self.assertEqual([("valhalla.yml", self.path),
+                          ("valhalla-api.yml", os.path.join(self.path, "api")),
+                          ("valhalla-nested.yml", os.path.join(self.path, "api/deep/nested"))],
+                         self.kinds())
+
+    def test_examples_and_resources_of_tests_are_pruned(self):
+        create_files(self.path, ["examples/valhalla-example.yml", "test/resources/valhalla.yml",
+                                 "api/src/test/resources/valhalla-fixture.yml", "api/resources/valhalla-res.yml"])
+
+        self.assertEqual(["valhalla.yml", "valhalla-api.yml", "valhalla-res.yml", "valhalla-nested.yml"],
+                         [filename for filename, _ in self.kinds()])
+
+    @patch('valhalla.version.version_to_release.error')
+    def test_invalid_max_depth_is_reported(self, mock_error):
+        with self.assertRaises(SystemExit):
+            self.kinds(VALHALLA_CONFIG_MAX_DEPTH="two")
+
+        mock_error.assert_called_once_with("VALHALLA_CONFIG_MAX_DEPTH must be a non-negative number, got: two")
+
+    def test_max_depth_limits_search(self):
+        self.assertEqual([("valhalla.yml", self.path)], self.kinds(VALHALLA_CONFIG_MAX_DEPTH="0"))
+        self.assertEqual(2, len(self.kinds(VALHALLA_CONFIG_MAX_DEPTH="1")))
+
+    def test_search_paths_are_searched_without_subdirectories(self):
+        self.assertEqual([("valhalla.yml", self.path), ("valhalla-api.yml", os.path.join(self.path, "api"))],
+                         self.kinds(VALHALLA_CONFIG_SEARCH_PATHS=".,api"))
+
+    def test_git_discovery_finds_only_tracked_files(self):
+        subprocess.run(["git", "init", "-q"], cwd=self.path, check=True)
+        subprocess.run(["git", "add", "valhalla.yml", "api/deep"], cwd=self.path, check=True)
+
+        self.assertEqual([("valhalla.yml", self.path),
+                          ("valhalla-nested.yml", os.path.join(self.path, "api/deep/nested"))],
+                         self.kinds(VALHALLA_CONFIG_DISCOVERY="git"))
+
+    @patch('valhalla.version.version_to_release.warn')
+    def test_git_discovery_falls_back_to_walk_outside_of_repository(self, mock_warn):
+        with patch('valhalla.version.version_to_release.subprocess.run',
+                   side_effect=subprocess.CalledProcessError(128, "git")):
+            self.assertEqual(3, len(self.kinds(VALHALLA_CONFIG_DISCOVERY="git")))
+        mock_warn.assert_called_once()
+
+
+class ReleaseKindMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.kinds = [ReleaseKind("valhalla.yml", "", "."),
+                      ReleaseKind("valhalla-hotfix.yml", "-hotfix", "."),
+                      ReleaseKind("valhalla-hotfix-api.yml", "-hotfix-api", "."),
+                      ReleaseKind("valhalla-api.yml", "-api", "services/api")]
+        self.matcher = ReleaseKindMatcher(self.kinds)
+
+    def test_longest_prefix_wins(self):
+        self.assertEqual(("release-hotfix-api-", self.kinds[2]), self.matcher.match("release-hotfix-api-1.0.1"))
+        self.assertEqual(("release-hotfix-", self.kinds[1]), self.matcher.match("release-hotfix-1.0.1"))
+        self.assertEqual(("release-api-", self.kinds[3]), self.matcher.match("release-api-2.0.0"))
+
+    def test_main_kind_matches_when_no_specific_kind_matches(self):
+        self.assertEqual(("release-", self.kinds[0]), self.matcher.match("release-hotfi-1.0.0"))
+        self.assertIsNone(self.matcher.match("feature-1.0.0"))
+
+    def test_matcher_is_shared_by_version_to_release(self):
+        result = get_version_to_release_from_str("release-api-2.0.0", self.matcher)
+
+        self.assertEqual("2.0.0", result.version_number_to_release)
+        self.assertEqual("services/api/valhalla-api.yml", result.get_config_file_path())
+
+    def test_longer_suffix_wins_for_same_prefix(self):
+        matcher = ReleaseKindMatcher([ReleaseKind("valhalla-hotfix.yml", "-hotfix", "a"),
+                                      ReleaseKind("valhalla-hotfix-.yml", "-hotfix-", "b"),
+                                      ReleaseKind("valhalla-hotfix-copy.yml", "-hotfix-", "c")])
+
+        self.assertEqual("b", matcher.match("release-hotfix-1.0.0")[1].path)
+
+
+class MultiComponentVersionToReleaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.kinds = [ReleaseKind("valhalla.yml", "", "."),
+                      ReleaseKind("valhalla-api.yml", "-api", "services/api"),
+                      ReleaseKind("valhalla-web.yml", "-web", "services/web")]
+
+    def test_components_are_split_by_plus(self):
+        result = get_version_to_release_from_str("release-api-1.2.0+web-3.4.1", self.kinds)
+
+        self.assertEqual(("1.2.0", "valhalla-api.yml"),
+                         (result.version_number_to_release, result.release_kind.filename))
+        self.assertEqual([("3.4.1", "valhalla-web.yml")],
+                         [(c.version_number_to_release, c.release_kind.filename) for c in result.other_components])
+
+    def test_plus_not_followed_by_release_kind_is_part_of_version(self):
+        result = get_version_to_release_from_str("release-api-1.2.0+build.5+web-3.4.1+exp", self.kinds)
+
+        self.assertEqual("1.2.0+build.5", result.version_number_to_release)
+        self.assertEqual("3.4.1+exp", result.other_components[0].version_number_to_release)
+
+    def test_single_component_has_no_other_components(self):
+        result = get_version_to_release_from_str("release-1.0.0+build", self.kinds)
+
+        self.assertEqual("1.0.0+build", result.version_number_to_release)
+        self.assertEqual([], result.other_components)
+
+    @patch('valhalla.version.version_to_release.error')
+    def test_component_cannot_be_released_twice(self, mock_error):
+        with self.assertRaises(SystemExit):
+            get_version_to_release_from_str("release-api-1.2.0+api-1.3.0", self.kinds)
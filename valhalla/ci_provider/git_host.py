@@ -5,7 +5,7 @@ from typing import List
 from valhalla.common.get_config import MergeRequestConfig
 from valhalla.release.assets import Assets
 from valhalla.release.description import Description
-from valhalla.version.version_to_release import ReleaseKind, VersionToRelease
+from valhalla.version.version_to_release import ReleaseKind, VersionToRelease, ReleaseKindMatcher
 
 
 class Release(ABC):
@@ -22,7 +22,7 @@ class MergeRequest(ABC):
 
 class VersionToReleaseProvider(ABC):
     @abstractmethod
-    def get_from_branch_name(self, release_kinds: List[ReleaseKind]) -> VersionToRelease:
+    def get_from_branch_name(self, release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease:
         raise NotImplementedError
 
 
@@ -60,7 +60,7 @@ class GitHost:
         merge_request = MergeRequestType()
         return merge_request.create(merge_request_config)
 
-    def get_version_to_release(self, release_kinds: list[ReleaseKind]) -> VersionToRelease:
+    def get_version_to_release(self, release_kinds: list[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease:
         if self.is_github():
             from valhalla.ci_provider.github.get_version import \
                 GitHubVersionToReleaseProvider as VersionToReleaseProviderType
@@ -46,4 +46,7 @@ class GitHubClient:
         return self.session.post(url, json=json)
 
     def get(self, url: str, params=None):
-        return self.session.get(url, params=params)
\ No newline at end of file
+        return self.session.get(url, params=params)
+
+    def patch(self, url: str, json=None):
+        return self.session.patch(url, json=json)
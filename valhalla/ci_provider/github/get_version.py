@@ -3,12 +3,12 @@ from typing import List
 
 from valhalla.common.logger import info, error
 from valhalla.version.version_to_release import VersionToRelease, ReleaseKind, BASE_PREFIX, \
-    get_version_to_release_from_str
+    get_version_to_release_from_str, ReleaseKindMatcher
 from valhalla.ci_provider.git_host import VersionToReleaseProvider
 
 
 class GitHubVersionToReleaseProvider(VersionToReleaseProvider):
-    def get_from_branch_name(self, release_kinds: List[ReleaseKind]) -> VersionToRelease:
+    def get_from_branch_name(self, release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease:
         # In GitHub Actions, branch name is available under GITHUB_REF_NAME
         ref_name = os.environ.get('GITHUB_REF_NAME')
 
@@ -28,6 +28,6 @@ class GitHubVersionToReleaseProvider(VersionToReleaseProvider):
             exit(-1)
 
 
-def get_version_to_release_from_branch_name(release_kinds: List[ReleaseKind]) -> VersionToRelease:
+def get_version_to_release_from_branch_name(release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease:
     # Backward compatible wrapper
     return GitHubVersionToReleaseProvider().get_from_branch_name(release_kinds)
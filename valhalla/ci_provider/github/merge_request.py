@@ -59,7 +59,22 @@ class GitHubValhallaPullRequest:
             except Exception as e:
                 warn(f"Could not add comment to pull request because: {e}")
 
-        return MergeRequestHook(pr_number, _add_comment)
+        def _create_status(body: str):
+            comment_url = f"{self.client.api_url}/repos/{self.repo}/issues/{pr_number}/comments"
+            info(f"Adding status comment to pull request: {comment_url}")
+            resp = self.client.post(comment_url, json={"body": body})
+            if resp.status_code >= 300:
+                raise Exception(f"{resp.status_code} {resp.text}")
+            return resp.json().get('id')
+
+        def _edit_status(comment_id, body: str):
+            comment_url = f"{self.client.api_url}/repos/{self.repo}/issues/comments/{comment_id}"
+            info(f"Updating status comment in pull request: {comment_url}")
+            resp = self.client.patch(comment_url, json={"body": body})
+            if resp.status_code >= 300:
+                raise Exception(f"{resp.status_code} {resp.text}")
+
+        return MergeRequestHook(pr_number, _add_comment, _create_status, _edit_status)
 
     def __request_reviewers(self, pr_number: int, reviewers):
         try:
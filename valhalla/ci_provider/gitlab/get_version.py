@@ -3,12 +3,12 @@ from typing import List
 
 from valhalla.common.logger import info, error
 from valhalla.version.version_to_release import VersionToRelease, ReleaseKind, BASE_PREFIX, \
-    get_version_to_release_from_str
+    get_version_to_release_from_str, ReleaseKindMatcher
 from valhalla.ci_provider.git_host import VersionToReleaseProvider
 
 
 class GitLabVersionToReleaseProvider(VersionToReleaseProvider):
-    def get_from_branch_name(self, release_kinds: List[ReleaseKind]) -> VersionToRelease:
+    def get_from_branch_name(self, release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease:
         ci_commit_branch = os.environ.get('CI_COMMIT_BRANCH')
 
         if ci_commit_branch:
@@ -27,6 +27,6 @@ class GitLabVersionToReleaseProvider(VersionToReleaseProvider):
             exit(-1)
 
 
-def get_version_to_release_from_branch_name(release_kinds: List[ReleaseKind]) -> VersionToRelease:
+def get_version_to_release_from_branch_name(release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease:
     # Backward compatible wrapper used in tests
     return GitLabVersionToReleaseProvider().get_from_branch_name(release_kinds)
@@ -51,7 +51,17 @@ class GitLabValhallaMergeRequest(MergeRequest):
             except Exception as e:
                 warn(f"Could not add comment to merge request because: {e}")
 
-        return MergeRequestHook(mr_iid, _add_comment)
+        def _create_status(body: str):
+            mr_obj = self.project.mergerequests.get(mr_iid, iid=True)
+            return mr_obj.notes.create({'body': body}).id
+
+        def _edit_status(note_id, body: str):
+            mr_obj = self.project.mergerequests.get(mr_iid, lazy=True)
+            note = mr_obj.notes.get(note_id, lazy=True)
+            note.body = body
+            note.save()
+
+        return MergeRequestHook(mr_iid, _add_comment, _create_status, _edit_status)
 
     def __get_reviewer_ids(self, reviewers: List[str]) -> List[int]:
         result = []
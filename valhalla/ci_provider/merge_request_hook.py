@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from typing import Callable, Optional
+import threading
+from typing import Any, Callable, Optional
 
 from valhalla.common.resolver import resolve
 
+# status comment shows only the latest warnings
+MAX_STATUS_WARNINGS = 20
+
 
 class MergeRequestHook:
     """
@@ -11,19 +15,76 @@ class MergeRequestHook:
 
     - id: identifier of the created MR/PR
     - add_comment: method to add a comment to the created MR/PR
+    - update_status: method to create and then edit one status comment with a summary of warnings
 
     If creation is skipped, use MergeRequestHook.Skip which prints info that MR was not created.
+    If provider does not support editing comments, update_status adds a new comment.
     """
 
-    def __init__(self, mr_id: Optional[int], add_comment_impl: Optional[Callable[[str], None]] = None):
+    def __init__(self, mr_id: Optional[int], add_comment_impl: Optional[Callable[[str], None]] = None,
+                 create_status_impl: Optional[Callable[[str], Any]] = None,
+                 edit_status_impl: Optional[Callable[[Any, str], None]] = None):
         self.id = mr_id
         self._add_comment_impl = add_comment_impl
+        self._create_status_impl = create_status_impl
+        self._edit_status_impl = edit_status_impl
+        self._status_lock = threading.RLock()
+        self._status_comment_id = None
+        self._status_failed = False
+        self._status = ""
+        self._status_warnings = []
+        self._status_warnings_count = 0
 
     def add_comment(self, comment: str):
         if self._add_comment_impl is None:
             return
         self._add_comment_impl(resolve(comment))
 
+    def supports_status(self) -> bool:
+        return self._create_status_impl is not None and self._edit_status_impl is not None and not self._status_failed
+
+    def update_status(self, status: str):
+        if not self.supports_status():
+            self.add_comment(status)
+            return
+
+        with self._status_lock:
+            self._status = resolve(status)
+            self.__publish_status()
+
+    def add_status_warning(self, warning: str):
+        if not self.supports_status():
+            self.add_comment(warning)
+            return
+
+        with self._status_lock:
+            self._status_warnings.append(resolve(warning))
+            self._status_warnings = self._status_warnings[-MAX_STATUS_WARNINGS:]
+            self._status_warnings_count += 1
+            self.__publish_status()
+
+    def __publish_status(self):
+        body = self.__render_status()
+        try:
+            if self._status_comment_id is None:
+                self._status_comment_id = self._create_status_impl(body)
+            else:
+                self._edit_status_impl(self._status_comment_id, body)
+        except Exception as e:
+            from valhalla.common.logger import warn
+            self._status_failed = True
+            warn(f"Could not update status comment because: {e}, next messages will be added as new comments")
+
+    def __render_status(self) -> str:
+        body = self._status
+        if self._status_warnings_count > 0:
+            body += f"\n\n⚠️ Warnings: {self._status_warnings_count}"
+            skipped = self._status_warnings_count - len(self._status_warnings)
+            if skipped > 0:
+                body += f" (showing latest {len(self._status_warnings)})"
+            body += "\n\n" + "\n\n".join(self._status_warnings)
+        return body
+
     @classmethod
     def Skip(cls) -> "MergeRequestHook":
         # No MR created, provide a hook that only logs on add_comment
@@ -1,27 +1,170 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import List
 
-from valhalla.common.executor import Executor
-from valhalla.common.logger import error, info
+from valhalla.common.command_cache import run_with_cache
+from valhalla.common.executor import Executor, ExecutionResult, ShellSession
+from valhalla.common.get_config import CommandCacheConfig, get_command_cache_part
+from valhalla.common.logger import error, info, warn
 from valhalla.common.resolver import resolve
 from valhalla.version.version_to_release import BASE_PREFIX
 
 
-def execute(commands: List[str]):
-    for command in commands:
-        command = resolve(command)
-        result = Executor.run(command, check=False)
+class BeforeCommand:
 
-        if result is None:
-            error(f"Unexpected error occurred during executing command: {command}")
-            exit(1)
+    def __init__(self, command_id: str, command: str, needs: List[str], cache: CommandCacheConfig | None = None,
+                 timeout: float | None = None):
+        self.id = command_id
+        self.command = command
+        self.needs = needs
+        self.cache = cache
+        self.timeout = timeout
+
+    def __repr__(self):
+        return (f"BeforeCommand(id={self.id}, command={self.command}, needs={self.needs}, cache={self.cache}, "
+                f"timeout={self.timeout})")
 
-        if result.returncode != 0:
-            error(f"\n\n\n-----------------------------------------------------------\n"
-                  f"Executing command {command} finished with code: {result.returncode} , valhalla cannot \n" +
-                  f"continue releasing process! Fix it and retry!\n" +
-                  f"Delete this branch (and tag if created), fix your main branch \n"
-                  f"and create {BASE_PREFIX}* branch again, this simplifies fixes and reduce mistakes \n"
-                  f"-----------------------------------------------------------\n\n")
-            exit(result.returncode)
+
+def get_before_commands(commands: List[str | dict], timeout: float | None = None) -> List[BeforeCommand]:
+    """
+    Plain string commands depend on the command listed directly before them, so they are executed in order.
+    Commands defined as {id, command, needs} wait only for commands listed in needs.
+    Timeout applies to commands which do not define their own one.
+    """
+    result = []
+    for index, command in enumerate(commands or []):
+        if isinstance(command, dict):
+            command_id = str(command.get('id', f"command-{index + 1}"))
+            needs = command.get('needs') or []
+            needs = [str(n) for n in ([needs] if isinstance(needs, str) else needs)]
+            cache = get_command_cache_part(command.get('cache'))
+            command_timeout = command.get('timeout', timeout)
+            command_timeout = None if command_timeout is None else float(command_timeout)
+            result.append(BeforeCommand(command_id, command.get('command'), needs, cache, command_timeout))
         else:
-            info(f"Successfully executed command: '{command}'")
+            needs = [result[-1].id] if result else []
+            result.append(BeforeCommand(f"command-{index + 1}", command, needs, timeout=timeout))
+
+    __validate(result)
+    return result
+
+
+def execute(commands: List[str | dict], parallel: int = 1, session: bool = False, timeout: float | None = None):
+    before_commands = get_before_commands(commands, timeout)
+    parallel = max(1, parallel or 1)
+
+    shell_session = None
+    if session and parallel > 1:
+        warn("Shell session cannot be shared by commands executed in parallel, executing every command in new shell")
+    elif session:
+        shell_session = ShellSession()
+
+    try:
+        __execute_graph(before_commands, parallel, shell_session)
+    finally:
+        if shell_session is not None:
+            shell_session.close()
+
+
+def __execute_graph(before_commands: List[BeforeCommand], parallel: int, shell_session: ShellSession | None):
+
+    pending = list(before_commands)
+    done = set()
+    running = {}
+    failed = None
+    stop_event = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="valhalla-before") as pool:
+        try:
+            while pending or running:
+                if not stop_event.is_set():
+                    for before_command in [c for c in pending if all(n in done for n in c.needs)]:
+                        if len(running) >= parallel:
+                            break
+                        pending.remove(before_command)
+                        future = pool.submit(__run, before_command, stop_event, parallel > 1, shell_session)
+                        running[future] = before_command
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    before_command = running.pop(future)
+                    command, result = future.result()
+
+                    if failed is not None:
+                        info(f"Command {before_command.id} finished after failure of {failed[0].id}")
+                    elif result is None or result.returncode != 0:
+                        # fail fast, stop running commands and do not start new ones
+                        failed = (before_command, command, result)
+                        stop_event.set()
+                    else:
+                        done.add(before_command.id)
+                        info(f"Successfully executed command: '{command}'")
+        except BaseException:
+            # f.e. error of cache key, pool waits for running commands on exit, so they are stopped first
+            stop_event.set()
+            raise
+
+    if failed is not None:
+        __report_failure(*failed)
+
+
+def __run(before_command: BeforeCommand, stop_event: threading.Event, prefix_output: bool,
+          shell_session: ShellSession | None) -> tuple[str, ExecutionResult | None]:
+    command = resolve(before_command.command)
+    output_prefix = f"[{before_command.id}] " if prefix_output else ""
+    return command, run_with_cache(command, before_command.cache,
+                                   lambda: Executor.run(command, check=False, stream=True, stop_event=stop_event,
+                                                        output_prefix=output_prefix, session=shell_session,
+                                                        timeout=before_command.timeout))
+
+
+def __report_failure(before_command: BeforeCommand, command: str, result: ExecutionResult | None):
+    if result is None:
+        error(f"Unexpected error occurred during executing command: {command}")
+        exit(1)
+
+    error(f"\n\n\n-----------------------------------------------------------\n"
+          f"Executing command {command} finished with code: {result.returncode} , valhalla cannot \n" +
+          f"continue releasing process! Fix it and retry!\n" +
+          f"Delete this branch (and tag if created), fix your main branch \n"
+          f"and create {BASE_PREFIX}* branch again, this simplifies fixes and reduce mistakes \n"
+          f"-----------------------------------------------------------\n\n")
+    exit(result.returncode)
+
+
+def __validate(before_commands: List[BeforeCommand]):
+    ids = [c.id for c in before_commands]
+    duplicated = {i for i in ids if ids.count(i) > 1}
+    if duplicated:
+        error(f"Duplicated ids of before commands: {sorted(duplicated)}! Fix your valhalla.yml!")
+        exit(1)
+
+    for before_command in before_commands:
+        if not before_command.command:
+            error(f"Before command {before_command.id} has no command! Fix your valhalla.yml!")
+            exit(1)
+        unknown = [n for n in before_command.needs if n not in ids]
+        if unknown:
+            error(f"Before command {before_command.id} needs unknown commands: {unknown}! Fix your valhalla.yml!")
+            exit(1)
+
+    # Kahn's algorithm, commands left without order are part of a cycle
+    needs = {c.id: set(c.needs) for c in before_commands}
+    ordered = set()
+    ready = [i for i, n in needs.items() if not n]
+    while ready:
+        current = ready.pop()
+        ordered.add(current)
+        for i, n in needs.items():
+            if current in n:
+                n.discard(current)
+                if not n and i not in ordered and i not in ready:
+                    ready.append(i)
+
+    cycle = [i for i in ids if i not in ordered]
+    if cycle:
+        error(f"Before commands have cyclic needs: {cycle}! Fix your valhalla.yml!")
+        exit(1)
@@ -1,19 +1,95 @@
+import os
+import sys
+import tempfile
+from typing import List
+
 from git import Repo
 from git.exc import GitCommandError
 
+from valhalla.commit.ignore import create_ignore_matcher, IgnoreMatcher
 from valhalla.common.logger import info, warn, error
 from valhalla.common.resolver import resolve
 
+# number of paths staged by single git add, pathspecs are passed in file so there is no argv limit
+ADD_BATCH_SIZE = 10000
+# number of files of every kind logged one by one when staging, the rest is summarized
+ADD_LOG_LIMIT = 100
+# git versions introducing core.untrackedCache and builtin fsmonitor daemon
+UNTRACKED_CACHE_GIT_VERSION = (2, 8)
+FSMONITOR_GIT_VERSION = (2, 36)
+# builtin fsmonitor daemon is implemented only for macOS and Windows
+FSMONITOR_PLATFORMS = ("darwin", "win32")
 
-def is_ignored(file_path: str) -> bool:
-    if file_path.startswith(".m2/"):
-        return True
-    return False
+
+DEFAULT_IGNORE_MATCHER = create_ignore_matcher([])
+
+
+def is_ignored(file_path: str, matcher: IgnoreMatcher = DEFAULT_IGNORE_MATCHER) -> bool:
+    return matcher.is_ignored(file_path)
+
+
+class StatusSnapshot:
+    def __init__(self, untracked: List[str], modified: List[str], staged: List[str]):
+        self.untracked = untracked
+        # changed in working tree compared to index
+        self.modified = modified
+        # changed in index compared to HEAD
+        self.staged = staged
+
+    def is_clean(self) -> bool:
+        return not (self.untracked or self.modified or self.staged)
+
+    def __repr__(self):
+        return f"StatusSnapshot(untracked={self.untracked}, modified={self.modified}, staged={self.staged})"
+
+
+def parse_status(output: bytes) -> StatusSnapshot:
+    """
+    Parses output of git status --porcelain=v2 -z, paths are not quoted and can contain any character.
+    """
+    untracked, modified, staged = [], [], []
+    entries = output.split(b"\0")
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+
+        kind = entry[:1]
+        if kind == b"?":
+            untracked.append(os.fsdecode(entry[2:]))
+            continue
+        if kind == b"1":
+            fields = entry.split(b" ", 8)
+        elif kind == b"2":
+            fields = entry.split(b" ", 9)
+            # original path of rename or copy is the next entry
+            i += 1
+        elif kind == b"u":
+            fields = entry.split(b" ", 10)
+        else:
+            # ignored files and headers
+            continue
+
+        xy, path = fields[1], os.fsdecode(fields[-1])
+        if xy[:1] != b".":
+            staged.append(path)
+        if xy[1:2] != b".":
+            modified.append(path)
+
+    return StatusSnapshot(untracked, modified, staged)
 
 
 class GitRepository:
-    def __init__(self, git_username, git_email):
+    def __init__(self, git_username, git_email, ignore: List[str] | None = None, large_repository: bool = False,
+                 paths: List[str] | None = None):
         self.repository = Repo.init(".")
+        self.ignore_matcher = create_ignore_matcher(ignore)
+        self.paths = paths or []
+        self.started_fsmonitor = False
+        # passed as git -c options, so configuration of repository is not changed
+        self.git_options = self.__get_large_repository_options() if large_repository else {}
 
         if not git_username:
             info("Git username not set, using default valhalla-bot")
@@ -26,43 +102,98 @@ class GitRepository:
         self.repository.config_writer().set_value("user", "name", git_username).release()
         self.repository.config_writer().set_value("user", "email", git_email).release()
 
-    def status(self):
+    def status(self, snapshot: StatusSnapshot | None = None) -> StatusSnapshot:
+        if snapshot is None:
+            snapshot = self.status_snapshot()
+
         info("----------------------")
         info("Git status")
 
-        untracked = self.repository.untracked_files
-        for f in untracked:
+        for f in snapshot.untracked:
             info(f"{f} is untracked")
 
-        diffs = self.repository.index.diff(None)
-        for d in diffs:
-            info(f"{d.a_path} is modified")
+        for f in snapshot.modified:
+            info(f"{f} is modified")
+
+        for f in snapshot.staged:
+            info(f"{f} is staged")
 
         info("----------------------")
+        return snapshot
+
+    def status_snapshot(self) -> StatusSnapshot:
+        # single scan of working tree, untracked files are listed one by one like in GitPython untracked_files
+        git = self.repository.git(**self.git_options) if self.git_options else self.repository.git
+        pathspec = ["--", *self.paths] if self.paths else []
+        output = git.status("--porcelain=v2", "-z", "--untracked-files=all", *pathspec, stdout_as_string=False)
+        return parse_status(output)
+
+    def close(self):
+        if self.started_fsmonitor:
+            try:
+                self.repository.git.fsmonitor__daemon("stop")
+                info("Stopped git fsmonitor daemon")
+            except GitCommandError as e:
+                warn(f"Could not stop git fsmonitor daemon: {e}")
+            self.started_fsmonitor = False
+
+    def __get_large_repository_options(self) -> dict:
+        """
+        Gain depends on platform: on macOS and Windows fsmonitor avoids scanning the working tree, elsewhere only
+        untracked cache is used, which makes git status of a large repository only about 1.1x faster.
+        """
+        version = self.repository.git.version_info
+        options = []
+        if version >= UNTRACKED_CACHE_GIT_VERSION:
+            options.append("core.untrackedCache=true")
+        else:
+            warn(f"git {version} does not support core.untrackedCache")
+
+        if version >= FSMONITOR_GIT_VERSION and self.__fsmonitor_supported():
+            options.append("core.fsmonitor=true")
+        else:
+            warn(f"git {version} does not support builtin fsmonitor on this platform")
+
+        info(f"Large repository mode, using git options: {options}")
+        return {"c": options} if options else {}
+
+    def __fsmonitor_supported(self) -> bool:
+        if sys.platform not in FSMONITOR_PLATFORMS:
+            return False
+        try:
+            self.repository.git.fsmonitor__daemon("status")
+            # daemon is already running and is not owned by valhalla
+            return True
+        except GitCommandError as e:
+            if "not supported" in str(e.stderr):
+                return False
+            # daemon is not running, git status starts it and valhalla stops it in close()
+            self.started_fsmonitor = True
+            return True
 
     def commit(self, msg: str, add=True) -> bool:
-        self.status()
+        snapshot = self.status()
 
-        new_changes_in_stage = False
+        to_add = []
 
         if add:
-            untracked = self.repository.untracked_files
-            for f in untracked:
-                if is_ignored(f):
+            untracked = []
+            for f in snapshot.untracked:
+                if is_ignored(f, self.ignore_matcher):
                     warn(
                         f"Skipping untracked file: {f} check your .gitignore! see: https://github.com/logchange/valhalla/blob/master/README.md#-gitignore")
                 else:
-                    self.repository.git.add(f)
-                    info(f"Untracked file: {f} added to stage")
-                    new_changes_in_stage = True
+                    untracked.append(f)
+            self.__log_added("Untracked", untracked)
+            to_add += untracked
         else:
             info(f"add={add}, skipping adding untracked files")
 
-        modified = self.repository.index.diff(None)
-        for f in modified:
-            self.repository.git.add(f.a_path)
-            info(f"Modified file: {f.a_path} added to stage")
-            new_changes_in_stage = True
+        self.__log_added("Modified", snapshot.modified)
+        to_add += snapshot.modified
+
+        self.__add(to_add)
+        new_changes_in_stage = len(to_add) > 0
 
         if not new_changes_in_stage:
             warn("There is noting to commit!")
@@ -74,14 +205,43 @@ class GitRepository:
         self.status()
         return True
 
-    def push(self, token):
+    def __add(self, paths: List[str]):
+        # one git process per batch instead of one per file, NUL separated paths can contain any character
+        for start in range(0, len(paths), ADD_BATCH_SIZE):
+            with tempfile.NamedTemporaryFile("wb", prefix="valhalla-pathspec-", delete=False) as pathspec_file:
+                pathspec_file.write(b"".join(os.fsencode(p) + b"\0" for p in paths[start:start + ADD_BATCH_SIZE]))
+            try:
+                self.repository.git(literal_pathspecs=True, **self.git_options).add(
+                    f"--pathspec-from-file={pathspec_file.name}", "--pathspec-file-nul")
+            finally:
+                os.remove(pathspec_file.name)
+
+    @staticmethod
+    def __log_added(kind: str, paths: List[str]):
+        for f in paths[:ADD_LOG_LIMIT]:
+            info(f"{kind} file: {f} added to stage")
+        if len(paths) > ADD_LOG_LIMIT:
+            info(f"{kind} files: {len(paths) - ADD_LOG_LIMIT} more added to stage ({len(paths)} in total)")
+
+    def tag(self, tag_name: str):
+        try:
+            self.repository.git.tag(tag_name)
+        except GitCommandError as e:
+            error(f"Failed to create tag {tag_name}: {(e.stderr or '').strip()} CC @{{AUTHOR}}")
+            exit(-1)
+        info(f"Created tag {tag_name} at {self.repository.head.commit}")
+
+    def push(self, token, tags: List[str] | None = None, atomic: bool = False):
         info("Preparing to push")
         branch = self.repository.active_branch
 
         info(f"Current branch: {branch}")
 
+        # with --atomic remote updates branch and tags all together or none of them
+        options = ["--atomic"] if atomic else []
+        refs = [str(branch)] + [f"refs/tags/{t}" for t in tags or []]
         try:
-            self.repository.git.push(self.__get_push_url(token), str(branch))
+            self.repository.git.push(*options, self.__get_push_url(token), *refs)
         except GitCommandError as e:
             stderr = (e.stderr or "").strip()
             stdout = (e.stdout or "").strip()
@@ -0,0 +1,95 @@
+import re
+from typing import List
+
+from valhalla.common.logger import warn
+
+# always ignored, local maven repository is often created inside of project directory in CI,
+# anchored to repository root like before ignore patterns were configurable
+DEFAULT_IGNORE_PATTERNS = ["/.m2/"]
+
+
+class IgnoreMatcher:
+    """
+    Matches paths relative to repository root against gitignore-style patterns compiled into one regex.
+    Supported: comments, *, ?, [...], **, leading / (anchored to root) and trailing / (only directories).
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = []
+        regexes = []
+        for pattern in patterns:
+            regex = pattern_to_regex(pattern)
+            if regex is not None:
+                self.patterns.append(pattern)
+                regexes.append(regex)
+
+        self.__regex = re.compile("|".join(f"(?:{r})" for r in regexes)) if regexes else None
+
+    def is_ignored(self, file_path: str) -> bool:
+        return self.__regex is not None and self.__regex.fullmatch(file_path) is not None
+
+    def __repr__(self):
+        return f"IgnoreMatcher(patterns={self.patterns})"
+
+
+def create_ignore_matcher(patterns: List[str] | None) -> IgnoreMatcher:
+    return IgnoreMatcher(DEFAULT_IGNORE_PATTERNS + list(patterns or []))
+
+
+def pattern_to_regex(pattern: str) -> str | None:
+    pattern = pattern.strip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    if pattern.startswith("!"):
+        warn(f"Negated ignore pattern {pattern} is not supported, skipping it")
+        return None
+
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # pattern with / (other than trailing) is relative to repository root, otherwise it matches at any level
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    if not pattern:
+        return None
+
+    regex = __translate(pattern)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    # untracked files are listed one by one, pattern matching directory ignores everything inside
+    return regex + ("/.*" if directory_only else "(?:/.*)?")
+
+
+def __translate(pattern: str) -> str:
+    result = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            result.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            result.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+        elif c == "*":
+            result.append("[^/]*")
+            i += 1
+        elif c == "?":
+            result.append("[^/]")
+            i += 1
+        elif c == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            content = pattern[i + 1:end]
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            result.append("[" + content.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif c == "\\" and i + 1 < len(pattern):
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(c))
+            i += 1
+    return "".join(result)
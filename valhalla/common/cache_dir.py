@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+from valhalla.common.logger import warn
+
+CACHE_ENTRY_SUFFIX = ".json"
+TMP_FILE_SUFFIX = ".tmp"
+# temporary files left by interrupted writes are removed by eviction after this time
+STALE_TMP_FILE_SECONDS = 60 * 60
+
+
+def get_cache_dir() -> str:
+    cache_dir = os.getenv("VALHALLA_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "valhalla")
+
+
+def get_entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key + CACHE_ENTRY_SUFFIX)
+
+
+def load_entry(entry_path: str) -> Optional[dict]:
+    """
+    Returns JSON entry or None when it does not exist or cannot be read, entry is marked as recently used.
+    """
+    try:
+        with open(entry_path, encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(entry_path)
+        return entry
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        warn(f"Could not read cache entry {entry_path}: {e}")
+        return None
+
+
+def store_entry(cache_dir: str, entry_path: str, entry: dict, max_bytes: Optional[int] = None,
+                max_entries: Optional[int] = None):
+    """
+    Writes entry atomically (other processes see old or new entry, never part of it) into private directory
+    and evicts the least recently used entries above max_bytes or max_entries.
+    """
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=cache_dir, suffix=TMP_FILE_SUFFIX,
+                                         delete=False) as f:
+            tmp_path = f.name
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+        tmp_path = None
+        evict(cache_dir, max_bytes, max_entries)
+    except (OSError, TypeError, ValueError) as e:
+        warn(f"Could not store cache entry {entry_path}: {e}")
+    finally:
+        if tmp_path is not None:
+            __remove(tmp_path)
+
+
+def evict(cache_dir: str, max_bytes: Optional[int] = None, max_entries: Optional[int] = None):
+    now = time.time()
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if name.endswith(CACHE_ENTRY_SUFFIX):
+            entries.append((stat.st_mtime, stat.st_size, path))
+        elif name.endswith(TMP_FILE_SUFFIX) and now - stat.st_mtime > STALE_TMP_FILE_SECONDS:
+            __remove(path)
+
+    # least recently used entries are removed first
+    total = sum(size for _, size, _ in entries)
+    count = len(entries)
+    for _, size, path in sorted(entries):
+        if (max_bytes is None or total <= max_bytes) and (max_entries is None or count <= max_entries):
+            break
+        __remove(path)
+        total -= size
+        count -= 1
+
+
+def __remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,84 @@
+import glob
+import hashlib
+import os
+from typing import Callable, Optional
+
+from valhalla.common.cache_dir import get_cache_dir, get_entry_path, load_entry, store_entry
+from valhalla.common.executor import ExecutionResult
+from valhalla.common.get_config import CommandCacheConfig
+from valhalla.common.logger import info, warn
+
+CACHE_FORMAT_VERSION = "1"
+DEFAULT_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+
+def get_cache_max_bytes() -> int:
+    return int(os.getenv("VALHALLA_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES))
+
+
+def get_command_cache_dir() -> str:
+    return os.path.join(get_cache_dir(), "commands")
+
+
+def get_cache_key(command: str, cache_config: CommandCacheConfig) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_FORMAT_VERSION}\0{command}\0".encode("utf-8"))
+
+    files = set()
+    for pattern in cache_config.files:
+        files.update(f for f in glob.glob(pattern, recursive=True) if os.path.isfile(f))
+    for path in sorted(files):
+        digest.update(f"file\0{path}\0".encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+    for name in sorted(cache_config.env):
+        digest.update(f"env\0{name}\0{os.getenv(name, '')}\0".encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def run_with_cache(command: str, cache_config: Optional[CommandCacheConfig],
+                   run: Callable[[], Optional[ExecutionResult]]) -> Optional[ExecutionResult]:
+    """
+    Returns stored result of command when its inputs (files and env variables from cache config) did not change,
+    otherwise runs command and stores its result if it was successful.
+    """
+    if cache_config is None:
+        return run()
+
+    cache_dir = get_command_cache_dir()
+    key = get_cache_key(command, cache_config)
+    entry_path = get_entry_path(cache_dir, key)
+
+    cached = __load(entry_path)
+    if cached is not None:
+        info(f"Using cached result of command '{command}' (key: {key[:12]})")
+        if cached.stdout:
+            info(f"Output for command '{command}':\n{cached.stdout}")
+        return cached
+
+    info(f"No cached result of command '{command}' (key: {key[:12]}), executing")
+    result = run()
+    if result is not None and result.returncode == 0:
+        __store(cache_dir, entry_path, result)
+    return result
+
+
+def __load(entry_path: str) -> Optional[ExecutionResult]:
+    entry = load_entry(entry_path)
+    if entry is None:
+        return None
+    try:
+        return ExecutionResult(entry["returncode"], entry["stdout"], entry["stderr"])
+    except (KeyError, TypeError) as e:
+        warn(f"Could not read command cache entry {entry_path}: {e}")
+        return None
+
+
+def __store(cache_dir: str, entry_path: str, result: ExecutionResult):
+    # command is not stored, after resolving it can contain secrets
+    store_entry(cache_dir, entry_path, {"returncode": result.returncode, "stdout": result.stdout,
+                                        "stderr": result.stderr},
+                max_bytes=get_cache_max_bytes())
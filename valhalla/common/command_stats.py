@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+from valhalla.common.logger import info, warn, redact
+
+COMMAND_REPORT_PATH_ENV_NAME = "VALHALLA_COMMAND_REPORT"
+
+
+@dataclass
+class CommandStats:
+    command: str
+    phase: Optional[str]
+    returncode: Optional[int]
+    wall_seconds: float
+    # None when resource usage of command could not be measured, f.e. in shell session
+    user_seconds: Optional[float]
+    sys_seconds: Optional[float]
+    max_rss_kb: Optional[int]
+    stdout_bytes: int
+    stderr_bytes: int
+    timed_out: bool = False
+
+
+COMMAND_STATS: List[CommandStats] = []
+PHASE_SECONDS: dict = {}
+CURRENT_PHASE: Optional[str] = None
+STATS_LOCK = threading.Lock()
+
+
+def record_command_stats(stats: CommandStats):
+    # commands are resolved, so they can contain secrets, report is often kept as CI artifact
+    stats.command = redact(stats.command)
+    with STATS_LOCK:
+        COMMAND_STATS.append(stats)
+
+
+def get_command_stats() -> List[CommandStats]:
+    with STATS_LOCK:
+        return list(COMMAND_STATS)
+
+
+def get_current_phase() -> Optional[str]:
+    return CURRENT_PHASE
+
+
+def clear_command_stats():
+    global CURRENT_PHASE
+    with STATS_LOCK:
+        COMMAND_STATS.clear()
+        PHASE_SECONDS.clear()
+        CURRENT_PHASE = None
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Measures wall time of release phase, commands executed inside are reported as part of it.
+    """
+    global CURRENT_PHASE
+    previous = CURRENT_PHASE
+    CURRENT_PHASE = name
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        with STATS_LOCK:
+            PHASE_SECONDS[name] = PHASE_SECONDS.get(name, 0.0) + time.monotonic() - started
+        CURRENT_PHASE = previous
+
+
+def get_command_report_path() -> Optional[str]:
+    # written only on request, report in working tree would be committed with the next release
+    return os.getenv(COMMAND_REPORT_PATH_ENV_NAME) or None
+
+
+def report_command_stats(path: Optional[str] = None):
+    """
+    Logs phases and executed commands sorted from the longest one and writes the same data as JSON to path,
+    when it is given or set in VALHALLA_COMMAND_REPORT.
+    """
+    path = path or get_command_report_path()
+    with STATS_LOCK:
+        commands = sorted(COMMAND_STATS, key=lambda s: s.wall_seconds, reverse=True)
+        phases = dict(PHASE_SECONDS)
+
+    info("Phases:\n" + "\n".join(f"  {name}: {seconds:.2f}s" for name, seconds in phases.items()))
+    info("Commands (sorted by wall time):\n" + __format_table(commands))
+    if path is None:
+        return
+
+    report = {
+        "phases": [{"phase": name, "wall_seconds": seconds} for name, seconds in phases.items()],
+        "commands": [asdict(s) for s in commands],
+    }
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        info(f"Command report written to: {path}")
+    except OSError as e:
+        warn(f"Could not write command report to {path}: {e}")
+
+
+def __format_table(commands: List[CommandStats]) -> str:
+    header = ("wall[s]", "user[s]", "sys[s]", "max rss[KB]", "stdout[B]", "stderr[B]", "code", "phase", "command")
+    rows = [header]
+    for s in commands:
+        rows.append((f"{s.wall_seconds:.2f}",
+                      __format_optional(s.user_seconds),
+                      __format_optional(s.sys_seconds),
+                      "-" if s.max_rss_kb is None else str(s.max_rss_kb),
+                      str(s.stdout_bytes),
+                      str(s.stderr_bytes),
+                      "timeout" if s.timed_out else str(s.returncode),
+                      s.phase or "-",
+                      s.command))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header) - 1)]
+    return "\n".join("  " + "  ".join(value.ljust(width) for value, width in zip(row, widths)) + "  " + row[-1]
+                     for row in rows)
+
+
+def __format_optional(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds:.2f}"
@@ -0,0 +1,93 @@
+import queue
+import threading
+import time
+from typing import Callable
+
+# comments arriving within this time are joined into one comment
+DEFAULT_BATCH_WINDOW_SECONDS = 2.0
+
+
+class BackgroundCommentsDelivery:
+    """
+    Delivers comments on a background thread, so logging a warning does not wait for the HTTP round-trip.
+    Comments added within batch_window seconds to the same target are joined and delivered as one comment.
+    redact hides secrets in errors of delivery, which are printed because they cannot be logged to merge request.
+    """
+
+    def __init__(self, add_comment: Callable[[str], None], batch_window: float = DEFAULT_BATCH_WINDOW_SECONDS,
+                 redact: Callable[[str], str] = str):
+        self.__add_comment = add_comment
+        self.__batch_window = batch_window
+        self.__redact = redact
+        self.__queue = queue.Queue()
+        # guards __closed, so nothing is queued after the worker was told to stop
+        self.__lock = threading.Lock()
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name="valhalla-mr-comments", daemon=True)
+        self.__thread.start()
+
+    def send(self, comment: str, add_comment: Callable[[str], None] | None = None):
+        add_comment = add_comment or self.__add_comment
+        with self.__lock:
+            if not self.__closed:
+                self.__queue.put((add_comment, comment))
+                return
+        self.__deliver(add_comment, [comment])
+
+    def flush(self):
+        # comments added by the delivery itself (f.e. warning about failed request) are sent with the next batch
+        with self.__lock:
+            if self.__closed or threading.current_thread() is self.__thread:
+                return
+            done = threading.Event()
+            self.__queue.put(done)
+        done.wait()
+
+    def close(self):
+        self.flush()
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__queue.put(None)
+        self.__thread.join()
+
+    def __run(self):
+        target = None
+        batch = []
+        while True:
+            item = self.__queue.get() if not batch else self.__get_until(deadline)
+
+            if isinstance(item, tuple):
+                add_comment, comment = item
+                if batch and add_comment != target:
+                    self.__deliver(target, batch)
+                    batch = []
+                if not batch:
+                    target = add_comment
+                    deadline = time.monotonic() + self.__batch_window
+                batch.append(comment)
+                continue
+
+            # window elapsed, flush requested or closing
+            self.__deliver(target, batch)
+            batch = []
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None and self.__closed:
+                return
+
+    def __get_until(self, deadline: float):
+        try:
+            return self.__queue.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            return None
+
+    def __deliver(self, add_comment: Callable[[str], None], batch):
+        if not batch:
+            return
+        try:
+            add_comment("  \n".join(batch))
+        except BaseException as e:
+            print(self.__redact(f"[WARN] Could not deliver comment to merge request: {e}"))
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from valhalla.common.cache_dir import get_cache_dir, get_entry_path, load_entry, store_entry
+from valhalla.common.logger import info, warn
+from valhalla.extends import valhalla_extends
+
+# bump when format of cache entries or key changes
+CONFIG_CACHE_FORMAT_VERSION = "2"
+CONFIG_CACHE_ENV_NAME = "VALHALLA_CONFIG_CACHE"
+CONFIG_CACHE_MAX_ENTRIES = 100
+# valhalla is not installed as versioned package, so sources which build config stand for its version
+CONFIG_SOURCES = [os.path.join(os.path.dirname(os.path.dirname(__file__)), *path) for path in
+                  [("common", "yaml_loader.py"), ("extends", "valhalla_extends.py"), ("extends", "merge_dicts.py")]]
+
+
+def is_config_cache_enabled() -> bool:
+    return os.getenv(CONFIG_CACHE_ENV_NAME, "true").lower() not in ("false", "0", "no")
+
+
+def get_config_cache_dir() -> str:
+    return os.path.join(get_cache_dir(), "config")
+
+
+def get_config_cache_key(config_text: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{CONFIG_CACHE_FORMAT_VERSION}\0{CONFIG_SOURCES_HASH}\0".encode("utf-8"))
+    digest.update(config_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_cached_yml_dict(config_text: str) -> dict | None:
+    """
+    Returns valhalla.yml merged with extended files when none of them changed. Extended files are downloaded
+    (usually revalidated by extends cache), but neither they nor valhalla.yml are parsed again.
+    """
+    key = get_config_cache_key(config_text)
+    entry_path = get_entry_path(get_config_cache_dir(), key)
+    entry = load_entry(entry_path)
+    if entry is None:
+        return None
+    try:
+        extends = entry["extends"]
+        yml_dict = entry["yml_dict"]
+    except (KeyError, TypeError) as e:
+        warn(f"Could not read cached config {entry_path}: {e}")
+        return None
+
+    urls = [url for url, _ in extends]
+    with ThreadPoolExecutor(max_workers=valhalla_extends.EXTENDS_FETCH_WORKERS) as pool:
+        contents = list(pool.map(valhalla_extends.get_from_url, urls))
+    if [__hash(c) for c in contents] != [digest for _, digest in extends]:
+        info(f"Extended files changed, cached config (key: {key[:12]}) is not used")
+        return None
+
+    info(f"Using cached config (key: {key[:12]})")
+    return yml_dict
+
+
+def store_cached_yml_dict(config_text: str, extends_contents: dict, yml_dict: dict):
+    cache_dir = get_config_cache_dir()
+    entry_path = get_entry_path(cache_dir, get_config_cache_key(config_text))
+    entry = {"extends": [[url, __hash(content)] for url, content in extends_contents.items()], "yml_dict": yml_dict}
+    try:
+        # f.e. dates or not string keys would be loaded back as different values
+        stored_as_json = json.loads(json.dumps(entry))["yml_dict"] == yml_dict
+    except (TypeError, ValueError):
+        stored_as_json = False
+    if not stored_as_json:
+        info("Config contains values which cannot be stored as JSON, it is not cached")
+        return
+    store_entry(cache_dir, entry_path, entry, max_entries=CONFIG_CACHE_MAX_ENTRIES)
+
+
+def __hash(content) -> str:
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def __get_sources_hash() -> str:
+    digest = hashlib.sha256()
+    for path in CONFIG_SOURCES:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+CONFIG_SOURCES_HASH = __get_sources_hash()
@@ -1,8 +1,22 @@
+import os
+import signal
 import subprocess
+import threading
+import time
+import uuid
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Optional
 
-from valhalla.common.logger import info, error
+from valhalla.common.command_stats import CommandStats, record_command_stats, get_current_phase
+from valhalla.common.logger import info, warn, error
+
+# number of last output lines kept in ExecutionResult when streaming
+DEFAULT_TAIL_LINES = 1000
+# number of last error output lines reported as error when streaming
+ERROR_TAIL_LINES = 20
+# time given to command to exit after SIGTERM before it is killed
+KILL_GRACE_SECONDS = 5
 
 
 @dataclass
@@ -12,24 +26,296 @@ class ExecutionResult:
     stderr: str
 
 
+class ShellSessionError(Exception):
+    pass
+
+
+class ShellSession:
+    """
+    Keeps one bash process alive and executes commands in it one after another, so bash is not started
+    for every command and state (f.e. cd, export) is shared between commands. End of output of every command
+    is marked with a sentinel line which contains exit code.
+    """
+
+    def __init__(self):
+        self.__sentinel = f"__VALHALLA_COMMAND_DONE_{uuid.uuid4().hex}__"
+        self.__process = None
+
+    def execute(self, command: str, on_stdout_line: Callable[[str], None],
+                on_stderr_line: Callable[[str], None], timeout: Optional[float] = None) -> int:
+        self.__start()
+        delimiter = f"VALHALLA_COMMAND_{uuid.uuid4().hex}"
+        # eval keeps syntax errors inside command, stdin of command must not consume next commands
+        script = (f"eval \"$(cat <<'{delimiter}'\n{command}\n{delimiter}\n)\" < /dev/null\n"
+                  f"__valhalla_returncode=$?\n"
+                  f"printf '\\n{self.__sentinel}\\n' >&2\n"
+                  f"printf '\\n{self.__sentinel} %d\\n' $__valhalla_returncode\n")
+        try:
+            self.__process.stdin.write(script)
+            self.__process.stdin.flush()
+        except OSError as e:
+            self.close()
+            raise ShellSessionError(f"Could not send command to shell session: {e}")
+
+        finished = threading.Event()
+        if timeout is not None:
+            # whole session is killed, it is started again for next command
+            watch_process_group(self.__process.pid, finished, None, timeout)
+
+        stderr_reader = threading.Thread(target=self.__read_until_sentinel,
+                                         args=(self.__process.stderr, on_stderr_line), daemon=True)
+        stderr_reader.start()
+        returncode = self.__read_until_sentinel(self.__process.stdout, on_stdout_line)
+        stderr_reader.join()
+        finished.set()
+
+        if returncode is None:
+            # command exited the shell, f.e. by calling exit, next command starts new session
+            returncode = self.__process.wait()
+            self.__process = None
+        return returncode
+
+    def close(self):
+        if self.__process is None:
+            return
+        try:
+            self.__process.stdin.close()
+            self.__process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.__process.kill()
+        self.__process = None
+
+    def __start(self):
+        if self.__process is not None and self.__process.poll() is None:
+            return
+        try:
+            self.__process = subprocess.Popen(['/bin/bash'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                              stderr=subprocess.PIPE, text=True, errors='replace',
+                                              start_new_session=True)
+        except OSError as e:
+            raise ShellSessionError(f"Could not start shell session: {e}")
+
+    def __read_until_sentinel(self, pipe, on_line: Callable[[str], None]) -> Optional[int]:
+        # sentinel is printed after a new line, so the last line before it ends with one additional new line
+        previous = None
+        while True:
+            line = pipe.readline()
+            if line == "" or line.startswith(self.__sentinel):
+                if previous is not None:
+                    previous = previous[:-1] if line else previous
+                    if previous:
+                        on_line(previous)
+                if line == "":
+                    return None
+                code = line[len(self.__sentinel):].strip()
+                return int(code) if code else 0
+            if previous is not None:
+                on_line(previous)
+            previous = line
+
+
+def watch_process_group(pid: int, finished: threading.Event, stop_event: Optional[threading.Event],
+                        timeout: Optional[float]) -> threading.Event:
+    """
+    Terminates process group when stop_event is set or timeout passes before finished is set, processes which
+    ignore SIGTERM are killed after KILL_GRACE_SECONDS. Returned event is set when timeout was reached.
+    """
+    timed_out = threading.Event()
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    def watch():
+        while not finished.wait(0.1):
+            stopped = stop_event is not None and stop_event.is_set()
+            if deadline is not None and time.monotonic() >= deadline:
+                timed_out.set()
+            if stopped or timed_out.is_set():
+                __signal_process_group(pid, signal.SIGTERM)
+                if not finished.wait(KILL_GRACE_SECONDS):
+                    __signal_process_group(pid, signal.SIGKILL)
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+    return timed_out
+
+
+def __signal_process_group(pid: int, sig: int):
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
 class Executor:
     @staticmethod
-    def run(command: str, check: bool = True) -> Optional[ExecutionResult]:
+    def run(command: str, check: bool = True, stream: bool = False, tail_lines: int = DEFAULT_TAIL_LINES,
+            stop_event: Optional[threading.Event] = None, output_prefix: str = "",
+            session: Optional[ShellSession] = None, timeout: Optional[float] = None) -> Optional[ExecutionResult]:
+        if stream:
+            return Executor.__run_streaming(command, check, tail_lines, stop_event, output_prefix, session, timeout)
+
+        started = time.monotonic()
+        # subprocess.run reaps the process itself, so its resource usage is not known
+        usage = None
+        timed_out = False
         try:
-            result = subprocess.run(command, shell=True, executable='/bin/bash', check=check, capture_output=True,
-                                    text=True)
-            stdout = result.stdout
-            stderr = result.stderr
+            if timeout is not None:
+                returncode, stdout, stderr, usage, timed_out = Executor.__run_with_timeout(command, timeout)
+                if timed_out:
+                    error(f"Command '{command}' timed out after {timeout}s and was killed")
+                if check and returncode != 0:
+                    raise subprocess.CalledProcessError(returncode, command, stdout, stderr)
+            else:
+                result = subprocess.run(command, shell=True, executable='/bin/bash', check=check,
+                                        capture_output=True, text=True)
+                returncode, stdout, stderr, timed_out = result.returncode, result.stdout, result.stderr, False
 
             if stdout:
                 info(f"Output for command '{command}':\n{stdout}")
             if stderr:
                 error(f"Error output for command '{command}':\n{stderr}")
 
-            return ExecutionResult(result.returncode, stdout, stderr)
+            Executor.__record(command, returncode, started, stdout, stderr, usage, timed_out=timed_out)
+            return ExecutionResult(returncode, stdout, stderr)
         except subprocess.CalledProcessError as e:
             error(f"Error executing command '{e.cmd}': {e.stderr}")
+            Executor.__record(command, e.returncode, started, e.stdout, e.stderr, usage, timed_out=timed_out)
             return ExecutionResult(e.returncode, e.stdout, e.stderr)
         except Exception as e:
             error(f"Error occurred: {str(e)}")
             return None
+
+    @staticmethod
+    def __run_with_timeout(command: str, timeout: float):
+        # command runs in its own process group, so on timeout also processes started by it are killed
+        process = subprocess.Popen(command, shell=True, executable='/bin/bash', stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True, start_new_session=True)
+        finished = threading.Event()
+        timed_out = watch_process_group(process.pid, finished, None, timeout)
+        try:
+            # output is read without communicate(), which would reap the process before wait4
+            stderr = []
+            stderr_reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+            stderr_reader.start()
+            stdout = process.stdout.read()
+            stderr_reader.join()
+            process.stdout.close()
+            process.stderr.close()
+            returncode, usage = Executor.__wait(process)
+        finally:
+            finished.set()
+        return returncode, stdout, stderr[0], usage, timed_out.is_set()
+
+    @staticmethod
+    def __run_streaming(command: str, check: bool, tail_lines: int, stop_event: Optional[threading.Event],
+                        output_prefix: str, session: Optional[ShellSession],
+                        timeout: Optional[float]) -> Optional[ExecutionResult]:
+        # every line is logged when it arrives, only last tail_lines lines are kept in memory
+        try:
+            info(f"Output for command '{command}':")
+            started = time.monotonic()
+            stdout_tail = deque(maxlen=tail_lines)
+            stderr_tail = deque(maxlen=tail_lines)
+            # number of bytes of whole stdout and stderr
+            output_bytes = [0, 0]
+            forward_stdout = Executor.__line_forwarder(stdout_tail, output_bytes, 0, output_prefix)
+            forward_stderr = Executor.__line_forwarder(stderr_tail, output_bytes, 1, output_prefix + "[stderr] ")
+
+            returncode = None
+            usage = None
+            timed_out = False
+            if session is not None:
+                try:
+                    returncode = session.execute(command, forward_stdout, forward_stderr, timeout)
+                    # resource usage of single command in session is not known, session is killed on timeout
+                    timed_out = timeout is not None and returncode < 0 and time.monotonic() - started >= timeout
+                except ShellSessionError as e:
+                    warn(f"{e}, executing command in new shell")
+
+            if returncode is None:
+                returncode, usage, timed_out = Executor.__run_process(command, stop_event, timeout, forward_stdout,
+                                                                      forward_stderr)
+
+            stdout = "".join(stdout_tail)
+            stderr = "".join(stderr_tail)
+            last_error_lines = "".join(list(stderr_tail)[-ERROR_TAIL_LINES:])
+
+            if timed_out:
+                error(f"Command '{command}' timed out after {timeout}s and was killed")
+            if check and returncode != 0:
+                error(f"Error executing command '{command}': {last_error_lines}")
+            elif stderr:
+                error(f"Error output for command '{command}' (last lines):\n{last_error_lines}")
+
+            Executor.__record(command, returncode, started, output_bytes[0], output_bytes[1], usage, timed_out)
+            return ExecutionResult(returncode, stdout, stderr)
+        except Exception as e:
+            error(f"Error occurred: {str(e)}")
+            return None
+
+    @staticmethod
+    def __run_process(command: str, stop_event: Optional[threading.Event], timeout: Optional[float],
+                      forward_stdout: Callable[[str], None], forward_stderr: Callable[[str], None]):
+        # own process group allows to stop command together with processes started by it
+        watched = stop_event is not None or timeout is not None
+        process = subprocess.Popen(command, shell=True, executable='/bin/bash', stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True, errors='replace', start_new_session=watched)
+
+        finished = threading.Event()
+        timed_out = watch_process_group(process.pid, finished, stop_event, timeout) if watched else None
+
+        stderr_reader = threading.Thread(target=Executor.__forward_lines, args=(process.stderr, forward_stderr),
+                                         daemon=True)
+        stderr_reader.start()
+        Executor.__forward_lines(process.stdout, forward_stdout)
+
+        returncode, usage = Executor.__wait(process)
+        finished.set()
+        stderr_reader.join()
+        return returncode, usage, timed_out is not None and timed_out.is_set()
+
+    @staticmethod
+    def __wait(process):
+        # wait4 returns resource usage of this command only, also when other commands are running in parallel
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            return process.wait(), None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return process.returncode, usage
+
+    @staticmethod
+    def __record(command: str, returncode: int, started: float, stdout, stderr, usage, timed_out: bool = False):
+        record_command_stats(CommandStats(
+            command=command,
+            phase=get_current_phase(),
+            returncode=returncode,
+            wall_seconds=time.monotonic() - started,
+            user_seconds=None if usage is None else usage.ru_utime,
+            sys_seconds=None if usage is None else usage.ru_stime,
+            max_rss_kb=None if usage is None else usage.ru_maxrss,
+            stdout_bytes=Executor.__size(stdout),
+            stderr_bytes=Executor.__size(stderr),
+            timed_out=timed_out))
+
+    @staticmethod
+    def __size(output) -> int:
+        if isinstance(output, int):
+            return output
+        if isinstance(output, str):
+            return len(output.encode("utf-8", errors="replace"))
+        return len(output or b"")
+
+    @staticmethod
+    def __forward_lines(pipe, forward: Callable[[str], None]):
+        with pipe:
+            for line in pipe:
+                forward(line)
+
+    @staticmethod
+    def __line_forwarder(tail: deque, output_bytes: list, index: int, prefix: str) -> Callable[[str], None]:
+        def forward(line: str):
+            tail.append(line)
+            output_bytes[index] += len(line.encode("utf-8", errors="replace"))
+            info(prefix + line.rstrip("\n"))
+
+        return forward
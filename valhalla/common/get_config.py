@@ -1,20 +1,32 @@
 import os
 from typing import List
 
-from yaml import safe_load
-
+from valhalla.common.config_cache import is_config_cache_enabled, load_cached_yml_dict, store_cached_yml_dict
 from valhalla.common.logger import info, error
+from valhalla.common.yaml_loader import load_yaml
+from valhalla.extends.merge_dicts import LIST_STRATEGY_REPLACE, DEFAULT_LIST_MERGE_KEY
 from valhalla.extends.valhalla_extends import ValhallaExtends
 
 
+class CommandCacheConfig:
+    def __init__(self, files: List[str], env: List[str]):
+        self.files = files
+        self.env = env
+
+    def __repr__(self):
+        return f"CommandCacheConfig(files={self.files}, env={self.env})"
+
+
 class VersionConfig:
-    def __init__(self, from_command: str):
+    def __init__(self, from_command: str, cache: CommandCacheConfig | None = None):
         self.from_command = from_command
+        self.cache = cache
 
     def __repr__(self):
         return f"\n" \
                f"   VersionConfig( \n" \
                f"     from_command={self.from_command} \n" \
+               f"     cache={self.cache} \n" \
                f"   )"
 
 
@@ -38,12 +50,20 @@ class MergeRequestConfig:
 
 
 class CommitConfig:
-    def __init__(self, enabled: bool, git_username: str, git_email: str, msg: str, before_commands: List[str]):
+    def __init__(self, enabled: bool, git_username: str, git_email: str, msg: str, before_commands: List[str | dict],
+                 parallel: int = 1, session: bool = False, timeout: float | None = None,
+                 ignore: List[str] | None = None, large_repository: bool = False, paths: List[str] | None = None):
         self.enabled = enabled
         self.git_username = git_username
         self.git_email = git_email
         self.msg = msg
         self.before_commands = before_commands
+        self.parallel = parallel
+        self.session = session
+        self.timeout = timeout
+        self.ignore = ignore or []
+        self.large_repository = large_repository
+        self.paths = paths or []
 
     def __repr__(self):
         return f"\n" \
@@ -52,6 +72,12 @@ class CommitConfig:
                f"     git_username={self.git_username} \n" \
                f"     git_email={self.git_email} \n" \
                f"     before_commands={self.before_commands} \n" \
+               f"     parallel={self.parallel} \n" \
+               f"     session={self.session} \n" \
+               f"     timeout={self.timeout} \n" \
+               f"     ignore={self.ignore} \n" \
+               f"     large_repository={self.large_repository} \n" \
+               f"     paths={self.paths} \n" \
                f"   )"
 
 
@@ -84,13 +110,15 @@ class ReleaseAssetsConfig:
 
 
 class ReleaseDescriptionConfig:
-    def __init__(self, from_command: str):
+    def __init__(self, from_command: str, cache: CommandCacheConfig | None = None):
         self.from_command = from_command
+        self.cache = cache
 
     def __repr__(self):
         return f"\n" \
                f"   ReleaseDescriptionConfig( \n" \
                f"           from_command={self.from_command} \n" \
+               f"           cache={self.cache} \n" \
                f"   )"
 
 
@@ -132,7 +160,8 @@ class Config:
                  release_config: ReleaseConfig,
                  tag_config: TagConfig,
                  commit_after_release: CommitConfig,
-                 merge_request: MergeRequestConfig):
+                 merge_request: MergeRequestConfig,
+                 deferred_push: bool = False):
         self.version_config = version_config
         self.variables = variables
         self.git_host = git_host  # TODO, remove because it's not used anywhere'
@@ -141,6 +170,7 @@ class Config:
         self.tag_config = tag_config
         self.commit_after_release = commit_after_release
         self.merge_request = merge_request
+        self.deferred_push = deferred_push
 
     def __repr__(self):
         return f" Config( \n" \
@@ -152,6 +182,7 @@ class Config:
                f"   tag_config={self.tag_config} \n" \
                f"   commit_after_release={self.commit_after_release} \n" \
                f"   merge_request={self.merge_request} \n" \
+               f"   deferred_push={self.deferred_push} \n" \
                f" )"
 
 
@@ -159,11 +190,21 @@ def get_config(path: str) -> Config:
     info(f"Trying to load config from: {path} - current working directory: {os.getcwd()}")
     try:
         with open(path) as f:
-            org_yml_dict = safe_load(f)
-
-            extends_list = get_from_dict(org_yml_dict, 'extends', False)
-            extends = ValhallaExtends(extends_list)
-            yml_dict = extends.merge(org_yml_dict)
+            config_text = f.read()
+            # cached merged config is used only when valhalla.yml and all extended files did not change
+            cache_enabled = is_config_cache_enabled()
+            yml_dict = load_cached_yml_dict(config_text) if cache_enabled else None
+            if yml_dict is None:
+                org_yml_dict = load_yaml(config_text)
+
+                extends_list = get_from_dict(org_yml_dict, 'extends', False)
+                extends_merge = get_from_dict(org_yml_dict, 'extends_merge', False) or {}
+                extends = ValhallaExtends(extends_list,
+                                          extends_merge.get('lists', LIST_STRATEGY_REPLACE),
+                                          extends_merge.get('key', DEFAULT_LIST_MERGE_KEY))
+                yml_dict = extends.merge(org_yml_dict)
+                if cache_enabled:
+                    store_cached_yml_dict(config_text, extends.load(), yml_dict)
 
             info("yml_dict to read config from: " + str(yml_dict))
 
@@ -189,6 +230,8 @@ def get_config(path: str) -> Config:
             merge_request_dict = get_from_dict(yml_dict, 'merge_request', False)
             merge_request = get_merge_request_part(merge_request_dict)
 
+            deferred_push = get_from_dict(yml_dict, 'deferred_push', False)
+
             config = Config(
                 version,
                 variables,
@@ -197,7 +240,8 @@ def get_config(path: str) -> Config:
                 release_config,
                 tag_config,
                 commit_after_release,
-                merge_request
+                merge_request,
+                bool(deferred_push)
             )
 
             info("Loaded config: ")
@@ -214,7 +258,17 @@ def get_version_part(version_dict) -> VersionConfig | None:
         return VersionConfig("")
 
     from_command = get_from_dict(version_dict, 'from_command', False)
-    return VersionConfig(from_command)
+    cache = get_command_cache_part(get_from_dict(version_dict, 'cache', False))
+    return VersionConfig(from_command, cache)
+
+
+def get_command_cache_part(cache_dict: dict) -> CommandCacheConfig | None:
+    if cache_dict is None:
+        return None
+
+    files = get_from_dict(cache_dict, 'files', False) or []
+    env = get_from_dict(cache_dict, 'env', False) or []
+    return CommandCacheConfig(files, env)
 
 
 def get_commit_part(commit_config_dict: dict) -> CommitConfig | None:
@@ -229,7 +283,14 @@ def get_commit_part(commit_config_dict: dict) -> CommitConfig | None:
     msg = get_from_dict(commit_config_dict, 'msg', commit_other_options_required)
 
     before_commands = get_from_dict(commit_config_dict, 'before', commit_other_options_required)
-    return CommitConfig(enabled, git_username, git_email, msg, before_commands)
+    parallel = get_from_dict(commit_config_dict, 'parallel', False)
+    session = get_from_dict(commit_config_dict, 'session', False)
+    timeout = get_from_dict(commit_config_dict, 'timeout', False)
+    ignore = get_from_dict(commit_config_dict, 'ignore', False)
+    large_repository = get_from_dict(commit_config_dict, 'large_repository', False)
+    paths = get_from_dict(commit_config_dict, 'paths', False)
+    return CommitConfig(enabled, git_username, git_email, msg, before_commands, int(parallel or 1), bool(session),
+                        None if timeout is None else float(timeout), ignore, bool(large_repository), paths)
 
 
 def get_release_config_part(release_config_dict: dict) -> ReleaseConfig:
@@ -249,7 +310,8 @@ def get_release_description_config_part(description_dict: dict) -> ReleaseDescri
     if description_dict is None or description_dict == {}:
         return ReleaseDescriptionConfig("")
     from_command = get_from_dict(description_dict, 'from_command', True)
-    return ReleaseDescriptionConfig(from_command)
+    cache = get_command_cache_part(get_from_dict(description_dict, 'cache', False))
+    return ReleaseDescriptionConfig(from_command, cache)
 
 
 def get_release_assets_config_part(assets_dict: dict) -> ReleaseAssetsConfig:
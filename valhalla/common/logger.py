@@ -1,21 +1,42 @@
+import atexit
+import os
+
 from valhalla.ci_provider.merge_request_hook import MergeRequestHook
+from valhalla.common.comments_delivery import BackgroundCommentsDelivery
+from valhalla.common.redactor import Redactor, create_redactor
+
+LOG_LEVELS: dict = {"DEBUG": 10, "INFO": 20, "WARN": 30, "WARNING": 30, "ERROR": 40}
+LOG_LEVEL: int = LOG_LEVELS.get(os.getenv("VALHALLA_LOG_LEVEL", "INFO").upper(), LOG_LEVELS["INFO"])
 
 TOKEN: str = "not_set"
+REDACTOR: Redactor = Redactor([TOKEN])
 MR_HOOK: MergeRequestHook | None = None
 MR_HOOK_COMMENTS_COUNT: int = 0
 PENDING_MR_COMMENTS: list = []
+MR_COMMENTS_DELIVERY: BackgroundCommentsDelivery | None = None
 
 
 # Allows to hide sensitive data
 def init_logger(token: str):
-    global TOKEN
+    global TOKEN, REDACTOR
     TOKEN = token
+    REDACTOR = create_redactor(token)
 
 
-def init_logger_mr_hook(mr_hook: MergeRequestHook):
-    global MR_HOOK, MR_HOOK_COMMENTS_COUNT, PENDING_MR_COMMENTS
+# Hides secrets in data written outside of logs, f.e. reports
+def redact(msg: str) -> str:
+    return REDACTOR.redact(msg)
+
+
+# background=True delivers comments on a separate thread, joining comments logged in a short time into one
+def init_logger_mr_hook(mr_hook: MergeRequestHook, background: bool = False):
+    global MR_HOOK, MR_HOOK_COMMENTS_COUNT, PENDING_MR_COMMENTS, MR_COMMENTS_DELIVERY
+    close_logger_mr_hook()
     MR_HOOK = mr_hook
 
+    if MR_HOOK is not None and background:
+        MR_COMMENTS_DELIVERY = BackgroundCommentsDelivery(MR_HOOK.add_comment, redact=redact)
+
     if MR_HOOK is None or not PENDING_MR_COMMENTS:
         PENDING_MR_COMMENTS = []
         return
@@ -25,43 +46,91 @@ def init_logger_mr_hook(mr_hook: MergeRequestHook):
     for comment in pending:
         if MR_HOOK_COMMENTS_COUNT >= 50:
             break
-        MR_HOOK.add_comment(comment)
+        __send_mr_comment(comment)
         MR_HOOK_COMMENTS_COUNT += 1
+    flush_logger()
+
+
+# Waits until all comments are delivered
+def flush_logger():
+    if MR_COMMENTS_DELIVERY is not None:
+        MR_COMMENTS_DELIVERY.flush()
+
+
+def close_logger_mr_hook():
+    global MR_COMMENTS_DELIVERY
+    if MR_COMMENTS_DELIVERY is not None:
+        MR_COMMENTS_DELIVERY.close()
+        MR_COMMENTS_DELIVERY = None
+
+
+def __send_mr_comment(comment: str, add_comment=None):
+    add_comment = add_comment or MR_HOOK.add_comment
+    if MR_COMMENTS_DELIVERY is not None:
+        MR_COMMENTS_DELIVERY.send(comment, add_comment)
+    else:
+        add_comment(comment)
 
 
 def log_message(level, msg):
     from valhalla.common import resolver
     import sys
-    global TOKEN, MR_HOOK, MR_HOOK_COMMENTS_COUNT, PENDING_MR_COMMENTS
+    global MR_HOOK, MR_HOOK_COMMENTS_COUNT, PENDING_MR_COMMENTS
+    # level filters only printing, warnings and errors are always delivered to merge request
+    printed = LOG_LEVELS.get(level, LOG_LEVELS["INFO"]) >= LOG_LEVEL
+    delivered = level == "WARN" or level == "ERROR"
+    if not printed and not delivered:
+        return
+
     msg = str(msg)
-    msg = resolver.resolve(msg, suppress_log=True)
-    msg = msg.replace(TOKEN, "*" * len(TOKEN))
+    # only messages with variables are resolved, resolved values can contain secrets, so redaction goes after it
+    if "{" in msg:
+        msg = resolver.resolve(msg, suppress_log=True)
+    msg = REDACTOR.redact(msg)
     lines = msg.split('\n')
 
     formatted_msg = ""
     for line in lines:
         line_to_print = f"[{level}] {line}"
-        print(line_to_print)
+        if printed:
+            print(line_to_print)
         if formatted_msg == "":
             formatted_msg = line_to_print
         else:
             formatted_msg += "  \n" + line_to_print
 
-    if level != "WARN" and level != "ERROR":
+    if not delivered:
         return
 
     if MR_HOOK is None:
         PENDING_MR_COMMENTS.append(formatted_msg)
         return
 
+    # warnings go to the summary in status comment, which is edited instead of adding new comments
+    if level == "WARN" and MR_HOOK.supports_status():
+        __send_mr_comment(formatted_msg, MR_HOOK.add_status_warning)
+        return
+
     if MR_HOOK_COMMENTS_COUNT >= 50:
         error_msg = f"[ERROR] Too many comments added to Merge Request (limit: 50). Please fix previous warnings."
-        MR_HOOK.add_comment(error_msg)
+        __send_mr_comment(error_msg)
+        flush_logger()
         print(error_msg)
         sys.exit(1)
-    MR_HOOK.add_comment(formatted_msg)
+    __send_mr_comment(formatted_msg)
     MR_HOOK_COMMENTS_COUNT += 1
 
+    # errors are usually followed by exit, so they are delivered immediately
+    if level == "ERROR":
+        flush_logger()
+
+
+atexit.register(close_logger_mr_hook)
+
+
+def debug(msg):
+    log_message("DEBUG", msg)
+
 
 def info(msg):
     log_message("INFO", msg)
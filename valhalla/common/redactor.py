@@ -0,0 +1,109 @@
+import base64
+import fnmatch
+import os
+import re
+from typing import List
+from urllib.parse import quote
+
+# environment variables with matching names are treated as secrets and hidden in logs
+DEFAULT_SECRET_ENV_PATTERNS = ["*TOKEN*", "*PASSWORD*", "*PASSWD*", "*SECRET*", "*PRIVATE_KEY*", "*API_KEY*",
+                               "*SIGNING_KEY*", "*JWT*"]
+# comma separated list of additional patterns, f.e. MY_REGISTRY_*,*_CREDENTIALS
+SECRET_ENV_PATTERNS_ENV_NAME = "VALHALLA_SECRET_ENV_PATTERNS"
+# shorter values (f.e. true, 1) would hide too much of the output
+MIN_SECRET_LENGTH = 6
+# below this number of secret variants str.replace is faster than regex alternation, which tries the trie
+# at every position of the message (see benchmark/redactor_benchmark.py)
+REGEX_MIN_SECRET_VARIANTS = 800
+
+
+class Redactor:
+    """
+    Hides all secrets (and their URL-encoded and base64 forms) in the message.
+    Usually there are only a few secrets, which are replaced one by one, longest first. Many secrets are compiled
+    into one regex built from a prefix trie, its cost still grows with the number of secrets, but slower than
+    the cost of scanning the message once per secret.
+    """
+
+    def __init__(self, secrets: List[str]):
+        variants = set()
+        for secret in secrets:
+            if secret:
+                variants.update(get_secret_variants(secret))
+
+        self.secrets_count = len(variants)
+        if self.secrets_count < REGEX_MIN_SECRET_VARIANTS:
+            # longer secrets first, so secret containing another one is hidden as a whole
+            self.__secrets = sorted(variants, key=lambda v: (-len(v), v))
+            self.pattern = None
+            self.__regex = None
+        else:
+            self.__secrets = []
+            self.pattern = get_trie_pattern(variants)
+            self.__regex = re.compile(self.pattern)
+
+    def redact(self, msg: str) -> str:
+        if self.__regex is not None:
+            return self.__regex.sub(lambda m: "*" * len(m.group(0)), msg)
+        for secret in self.__secrets:
+            if secret in msg:
+                msg = msg.replace(secret, "*" * len(secret))
+        return msg
+
+
+def get_secret_variants(secret: str) -> List[str]:
+    return [
+        secret,
+        quote(secret, safe=''),
+        base64.b64encode(secret.encode("utf-8")).decode("ascii"),
+    ]
+
+
+def get_secret_env_patterns() -> List[str]:
+    patterns = list(DEFAULT_SECRET_ENV_PATTERNS)
+    custom = os.getenv(SECRET_ENV_PATTERNS_ENV_NAME, "")
+    patterns.extend(p.strip() for p in custom.split(",") if p.strip())
+    return patterns
+
+
+def get_secrets_from_env(patterns: List[str]) -> List[str]:
+    secrets = []
+    for name, value in os.environ.items():
+        if len(value) < MIN_SECRET_LENGTH:
+            continue
+        if any(fnmatch.fnmatchcase(name.upper(), p.upper()) for p in patterns):
+            secrets.append(value)
+    return secrets
+
+
+def create_redactor(token: str) -> Redactor:
+    return Redactor([token] + get_secrets_from_env(get_secret_env_patterns()))
+
+
+def get_trie_pattern(words) -> str:
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    return __render(trie)
+
+
+def __render(node: dict) -> str:
+    # single child chains (long secrets) are rendered in a loop to keep recursion only on branches
+    result = ""
+    while len(node) == 1 and "" not in node:
+        ch, node = next(iter(node.items()))
+        result += re.escape(ch)
+
+    branches = [re.escape(ch) + __render(child) for ch, child in sorted(node.items()) if ch != ""]
+    if not branches:
+        return result
+
+    group = "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # secret ends here but a longer one shares the prefix, prefer the longer one
+        return result + group + "?"
+    return result + group
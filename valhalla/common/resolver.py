@@ -1,5 +1,7 @@
 import os
 import re
+from collections import ChainMap
+from functools import lru_cache
 
 VERSION = "not_set"
 VERSION_MAJOR = "not_set"
@@ -10,6 +12,12 @@ VALHALLA_TOKEN = "not_set"
 AUTHOR = "not_set"
 CUSTOM_VARIABLES_DICT = dict()
 
+# {NAME} placeholders, all of them are resolved in one scan of the string
+PLACEHOLDER_PATTERN = re.compile(r"\{([^{}]+)\}")
+
+# max number of distinct strings remembered by resolve
+RESOLVE_CACHE_SIZE = 1024
+
 
 def init_str_resolver(token: str, author: str):
     global VALHALLA_TOKEN
@@ -17,6 +25,7 @@ def init_str_resolver(token: str, author: str):
 
     VALHALLA_TOKEN = token
     AUTHOR = author
+    clear_resolve_cache()
 
 
 def init_str_resolver_set_version(version: str):
@@ -31,6 +40,7 @@ def init_str_resolver_set_version(version: str):
     VERSION_MINOR = __get_minor(version)
     VERSION_PATCH = __get_patch(version)
     VERSION_SLUG = __get_slug(version)
+    clear_resolve_cache()
 
 
 def init_str_resolver_custom_variables(variables: dict):
@@ -38,19 +48,22 @@ def init_str_resolver_custom_variables(variables: dict):
     global CUSTOM_VARIABLES_DICT
 
     CUSTOM_VARIABLES_DICT.update({} if variables is None else variables)
+    clear_resolve_cache()
 
     for key, value in CUSTOM_VARIABLES_DICT.items():
         info(f"Custom variable: {key} set to: {value}")
 
 
+def reset_str_resolver_custom_variables():
+    CUSTOM_VARIABLES_DICT.clear()
+    clear_resolve_cache()
+
+
 def resolve(string: str, suppress_log: bool = False):
     if VALHALLA_TOKEN == "not_set":
         return string
 
-    # hierarchy
-    string = __resolve_predefined(string)
-    string = __resolve_custom_variables(string)
-    string = __resolve_from_env(string)
+    string = __resolve_cached(string)
 
     if not suppress_log:
         from valhalla.common.logger import info
@@ -58,41 +71,44 @@ def resolve(string: str, suppress_log: bool = False):
     return string
 
 
-def __resolve_predefined(string: str):
-    global VERSION
-    global VERSION_MAJOR
-    global VERSION_MINOR
-    global VERSION_PATCH
-    global VERSION_SLUG
-    global VALHALLA_TOKEN
-    global AUTHOR
+def clear_resolve_cache():
+    __resolve_cached.cache_clear()
+    __variables.cache_clear()
 
-    string = string.replace("{VERSION}", VERSION)
-    string = string.replace("{VERSION_MAJOR}", VERSION_MAJOR)
-    string = string.replace("{VERSION_MINOR}", VERSION_MINOR)
-    string = string.replace("{VERSION_PATCH}", VERSION_PATCH)
-    string = string.replace("{VERSION_SLUG}", VERSION_SLUG)
-    string = string.replace("{VALHALLA_TOKEN}", VALHALLA_TOKEN)
-    string = string.replace("{AUTHOR}", AUTHOR)
 
-    return string
+def get_resolve_cache_info():
+    return __resolve_cached.cache_info()
 
 
-def __resolve_custom_variables(string: str):
-    global CUSTOM_VARIABLES_DICT
+# Cached results are valid as long as resolver state does not change, every init_str_resolver* clears the cache
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def __resolve_cached(string: str) -> str:
+    variables = __variables()
+    return PLACEHOLDER_PATTERN.sub(lambda m: variables.get(m.group(1), m.group(0)), string)
 
-    for key, value in CUSTOM_VARIABLES_DICT.items():
-        string = string.replace("{" + key + "}", value)
 
-    return string
+@lru_cache(maxsize=1)
+def __variables() -> ChainMap:
+    # hierarchy
+    return ChainMap(__predefined(), __custom_variables(), os.environ)
 
 
-def __resolve_from_env(string: str):
-    # Iterating over each environment variable
-    for env_var in os.environ:
-        if os.environ.get(env_var, '') is not None:
-            string = string.replace('{' + env_var + '}', os.environ.get(env_var, ''))
-    return string
+def __predefined() -> dict:
+    return {
+        "VERSION": VERSION,
+        "VERSION_MAJOR": VERSION_MAJOR,
+        "VERSION_MINOR": VERSION_MINOR,
+        "VERSION_PATCH": VERSION_PATCH,
+        "VERSION_SLUG": VERSION_SLUG,
+        "VALHALLA_TOKEN": VALHALLA_TOKEN,
+        "AUTHOR": AUTHOR,
+    }
+
+
+def __custom_variables() -> dict:
+    # env variables used in custom variables are resolved, f.e. IMAGE: "registry/{CI_PROJECT_PATH}:latest"
+    return {key: PLACEHOLDER_PATTERN.sub(lambda m: os.environ.get(m.group(1), m.group(0)), str(value))
+            for key, value in CUSTOM_VARIABLES_DICT.items()}
 
 
 def __get_slug(version):
@@ -0,0 +1,20 @@
+import yaml
+
+# libyaml based loader is many times faster, it is available only when PyYAML was built with libyaml
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+YAML_LOADER = SafeLoader
+
+
+def is_libyaml_loader() -> bool:
+    return YAML_LOADER.__name__ == "CSafeLoader"
+
+
+def load_yaml(stream):
+    """
+    Same as yaml.safe_load, but uses libyaml when available. Stream can be str, bytes or opened file.
+    """
+    return yaml.load(stream, Loader=YAML_LOADER)
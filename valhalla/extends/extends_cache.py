@@ -0,0 +1,96 @@
+import hashlib
+import os
+import time
+from typing import Optional
+
+from valhalla.common.cache_dir import get_cache_dir, get_entry_path, load_entry, store_entry
+from valhalla.common.logger import warn
+
+EXTENDS_CACHE_FORMAT_VERSION = "1"
+EXTENDS_CACHE_ENV_NAME = "VALHALLA_EXTENDS_CACHE"
+EXTENDS_MAX_AGE_ENV_NAME = "VALHALLA_EXTENDS_MAX_AGE"
+EXTENDS_OFFLINE_ENV_NAME = "VALHALLA_EXTENDS_OFFLINE"
+EXTENDS_CACHE_MAX_BYTES_ENV_NAME = "VALHALLA_EXTENDS_CACHE_MAX_BYTES"
+# by default every run revalidates cached file, which costs only a request answered with 304 Not Modified
+DEFAULT_EXTENDS_MAX_AGE_SECONDS = 0
+DEFAULT_EXTENDS_CACHE_MAX_BYTES = 10 * 1024 * 1024
+
+
+class ExtendsCacheEntry:
+    def __init__(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        # url before resolving variables, so tokens are not stored on disk
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def __repr__(self):
+        return f"ExtendsCacheEntry(url={self.url}, etag={self.etag}, last_modified={self.last_modified}, " \
+               f"fetched_at={self.fetched_at})"
+
+
+def __is_enabled(env_name: str, default: bool) -> bool:
+    value = os.getenv(env_name)
+    if not value:
+        return default
+    return value.lower() not in ("false", "0", "no")
+
+
+def is_extends_cache_enabled() -> bool:
+    return __is_enabled(EXTENDS_CACHE_ENV_NAME, True)
+
+
+def is_extends_offline_enabled() -> bool:
+    """
+    In offline mode cached file is used, even if it is stale, when server cannot be reached or fails.
+    """
+    return __is_enabled(EXTENDS_OFFLINE_ENV_NAME, False)
+
+
+def get_extends_max_age() -> float:
+    return float(os.getenv(EXTENDS_MAX_AGE_ENV_NAME) or DEFAULT_EXTENDS_MAX_AGE_SECONDS)
+
+
+def get_extends_cache_max_bytes() -> int:
+    return int(os.getenv(EXTENDS_CACHE_MAX_BYTES_ENV_NAME) or DEFAULT_EXTENDS_CACHE_MAX_BYTES)
+
+
+def get_extends_cache_dir() -> str:
+    return os.path.join(get_cache_dir(), "extends")
+
+
+def get_extends_cache_key(resolved_url: str) -> str:
+    return hashlib.sha256(f"{EXTENDS_CACHE_FORMAT_VERSION}\0{resolved_url}".encode("utf-8")).hexdigest()
+
+
+def load_extends_entry(key: str) -> Optional[ExtendsCacheEntry]:
+    entry_path = get_entry_path(get_extends_cache_dir(), key)
+    entry = load_entry(entry_path)
+    if entry is None:
+        return None
+    try:
+        return ExtendsCacheEntry(entry["url"], entry["body"], entry.get("etag"), entry.get("last_modified"),
+                                 entry["fetched_at"])
+    except (KeyError, TypeError, AttributeError) as e:
+        warn(f"Could not read extends cache entry {entry_path}: {e}")
+        return None
+
+
+def store_extends_entry(key: str, entry: ExtendsCacheEntry):
+    cache_dir = get_extends_cache_dir()
+    store_entry(cache_dir, get_entry_path(cache_dir, key),
+                {"url": entry.url, "body": entry.body, "etag": entry.etag, "last_modified": entry.last_modified,
+                 "fetched_at": entry.fetched_at},
+                max_bytes=get_extends_cache_max_bytes())
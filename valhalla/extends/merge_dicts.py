@@ -1,23 +1,67 @@
 import copy
 
+LIST_STRATEGY_REPLACE = "replace"
+LIST_STRATEGY_APPEND = "append"
+LIST_STRATEGY_MERGE_BY_KEY = "merge_by_key"
+LIST_STRATEGIES = [LIST_STRATEGY_REPLACE, LIST_STRATEGY_APPEND, LIST_STRATEGY_MERGE_BY_KEY]
+DEFAULT_LIST_MERGE_KEY = "id"
 
-def merge(parent: dict, child: dict):
-    parent_copy = copy.deepcopy(parent)
-    child_copy = copy.deepcopy(child)
 
-    return __merge(parent_copy, child_copy)
+def merge(parent: dict, child: dict, list_strategy: str = LIST_STRATEGY_REPLACE, list_key: str = DEFAULT_LIST_MERGE_KEY,
+          share: bool = False):
+    """
+    Merges child into parent in one traversal, values from child have higher priority.
+    Lists from child replace lists from parent, or with list_strategy:
+      append       - items of child list are added after items of parent list
+      merge_by_key - dict items with the same list_key value are merged, other items of child are added at the end
+    Inputs are not modified. Result does not share anything with inputs, unless share is True, then subtrees
+    taken without changes are shared with inputs, so inputs must not be modified later.
+    """
+    if list_strategy not in LIST_STRATEGIES:
+        raise ValueError(f"Unknown list strategy: {list_strategy}, use one of: {LIST_STRATEGIES}")
 
+    take = __share if share else copy.deepcopy
+    return __merge(parent, child, list_strategy, list_key, take)
 
-def __merge(parent_org: dict, child_org: dict):
-    parent_copy = copy.deepcopy(parent_org)
-    child_copy = copy.deepcopy(child_org)
 
-    if isinstance(child_copy, dict):
-        for k, v in child_copy.items():
-            if k in parent_copy:
-                parent_copy[k] = __merge(parent_copy.get(k), v)
-            else:
-                parent_copy[k] = v
-        return parent_copy
-    else:
-        return child_copy
+def __merge(parent, child, list_strategy: str, list_key: str, take):
+    if isinstance(child, dict) and isinstance(parent, dict):
+        result = {}
+        for k, v in parent.items():
+            result[k] = __merge(v, child[k], list_strategy, list_key, take) if k in child else take(v)
+        for k, v in child.items():
+            if k not in parent:
+                result[k] = take(v)
+        return result
+
+    if isinstance(child, list) and isinstance(parent, list):
+        if list_strategy == LIST_STRATEGY_APPEND:
+            return [take(v) for v in parent] + [take(v) for v in child]
+        if list_strategy == LIST_STRATEGY_MERGE_BY_KEY:
+            return __merge_by_key(parent, child, list_strategy, list_key, take)
+
+    return take(child)
+
+
+def __merge_by_key(parent: list, child: list, list_strategy: str, list_key: str, take) -> list:
+    child_by_key = {}
+    for v in child:
+        if isinstance(v, dict) and list_key in v:
+            child_by_key.setdefault(v[list_key], v)
+
+    result = []
+    merged = set()
+    for v in parent:
+        match = child_by_key.get(v.get(list_key)) if isinstance(v, dict) and list_key in v else None
+        if match is not None and id(match) not in merged:
+            result.append(__merge(v, match, list_strategy, list_key, take))
+            merged.add(id(match))
+        else:
+            result.append(take(v))
+
+    result += [take(v) for v in child if id(v) not in merged]
+    return result
+
+
+def __share(value):
+    return value
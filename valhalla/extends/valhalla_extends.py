@@ -1,51 +1,206 @@
-from typing import List
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict
 
 import requests
-from yaml import safe_load
 
-from valhalla.common.logger import info, error
-from valhalla.extends.merge_dicts import merge
+from valhalla.common.logger import info, error, warn, debug
+from valhalla.extends.extends_cache import ExtendsCacheEntry, is_extends_cache_enabled, is_extends_offline_enabled, \
+    get_extends_cache_key, get_extends_max_age, load_extends_entry, store_extends_entry
+from valhalla.extends.merge_dicts import merge, LIST_STRATEGIES, LIST_STRATEGY_REPLACE, DEFAULT_LIST_MERGE_KEY
 from valhalla.common.resolver import resolve
+from valhalla.common.yaml_loader import load_yaml
+
+# extended files are small, downloading them is limited by latency
+EXTENDS_FETCH_WORKERS = 8
+EXTENDS_MAX_BYTES_ENV_NAME = "VALHALLA_EXTENDS_MAX_BYTES"
+EXTENDS_TIMEOUT_ENV_NAME = "VALHALLA_EXTENDS_TIMEOUT"
+DEFAULT_EXTENDS_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_EXTENDS_TIMEOUT_SECONDS = 30
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+class ExtendsDownloadError(Exception):
+    pass
+
+
+def get_extends_max_bytes() -> int:
+    return int(os.getenv(EXTENDS_MAX_BYTES_ENV_NAME) or DEFAULT_EXTENDS_MAX_BYTES)
+
+
+def get_extends_timeout() -> float:
+    return float(os.getenv(EXTENDS_TIMEOUT_ENV_NAME) or DEFAULT_EXTENDS_TIMEOUT_SECONDS)
 
 
 def get_from_url(url):
-    result = ""
     resolved_url = resolve(url)
-    response = requests.get(resolved_url)
+    key = get_extends_cache_key(resolved_url) if is_extends_cache_enabled() else None
+    cached = load_extends_entry(key) if key is not None else None
+
+    if cached is not None and cached.age() < get_extends_max_age():
+        info(f"Using cached {url} fetched {cached.age():.0f}s ago")
+        return __log_loaded(url, cached.body)
+
+    timeout = get_extends_timeout()
+    try:
+        response = requests.get(resolved_url, headers=cached.conditional_headers() if cached is not None else {},
+                                stream=True, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        return __get_stale_or_exit(url, cached, str(e))
+
+    try:
+        if response.status_code == 304 and cached is not None:
+            info(f"{url} not modified since it was cached")
+            cached.fetched_at = time.time()
+            store_extends_entry(key, cached)
+            return __log_loaded(url, cached.body)
+
+        if response.status_code != 200:
+            return __get_stale_or_exit(url, cached, f"Received status code {response.status_code}")
+
+        result = __read_body(response, get_extends_max_bytes(), time.monotonic() + timeout)
+    except (requests.exceptions.RequestException, ExtendsDownloadError, UnicodeDecodeError) as e:
+        return __get_stale_or_exit(url, cached, str(e))
+    finally:
+        response.close()
+
+    if key is not None:
+        store_extends_entry(key, ExtendsCacheEntry(url, result, response.headers.get("ETag"),
+                                                   response.headers.get("Last-Modified"), time.time()))
+    return __log_loaded(url, result)
+
 
-    if response.status_code != 200:
-        info(f"Error: Received status code {response.status_code} from url: {url}")
-        exit(1)
+def __read_body(response, max_bytes: int, deadline: float) -> str:
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and int(content_length) > max_bytes:
+        raise ExtendsDownloadError(f"File has {content_length} bytes, limit is {max_bytes} bytes")
 
-    data = response.text
-    for line in data:
-        result += line
+    # timeout of requests applies to every read, deadline limits the whole download
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+        body += chunk
+        if len(body) > max_bytes:
+            raise ExtendsDownloadError(f"File is larger than limit of {max_bytes} bytes")
+        if time.monotonic() > deadline:
+            raise ExtendsDownloadError("Download timed out")
 
-    info("Loaded from URL")
-    info("===========================================")
-    info(result)
-    info("===========================================")
+    # YAML files are UTF-8, charset of text/plain responses is often not set
+    return body.decode("utf-8-sig")
+
+
+def __get_stale_or_exit(url: str, cached: ExtendsCacheEntry | None, reason: str):
+    if cached is not None and is_extends_offline_enabled():
+        warn(f"{reason} from url: {url}, using cached file fetched {cached.age():.0f}s ago (offline mode)")
+        return __log_loaded(url, cached.body)
+
+    info(f"Error: {reason} from url: {url}")
+    exit(1)
+
+
+def __log_loaded(url: str, result: str) -> str:
+    content = result.encode("utf-8")
+    info(f"Loaded from URL: {url} ({len(content)} bytes, sha256: {hashlib.sha256(content).hexdigest()})")
+    # content can be long and is parsed anyway, so it is printed only for debugging
+    debug(result)
     return result
 
 
 class ValhallaExtends:
+    """
+    Loads extended files, files can extend other ones. Every url is downloaded once, files of the same level
+    are downloaded concurrently, and they are merged in declared order, so the last one has the highest priority.
+    """
+
+    def __init__(self, extends: List[str], list_strategy: str = LIST_STRATEGY_REPLACE,
+                 list_key: str = DEFAULT_LIST_MERGE_KEY):
+        self.extends = extends or []
+        if list_strategy not in LIST_STRATEGIES:
+            error(f"Unknown extends_merge lists strategy: {list_strategy}, use one of: {LIST_STRATEGIES}")
+            exit(1)
+        self.list_strategy = list_strategy
+        self.list_key = list_key
+        self.__contents = None
+        self.__documents = {}
+        self.__children = {}
 
-    def __init__(self, extends: List[str]):
-        self.extends = extends
+    def load(self) -> Dict[str, str]:
+        """
+        Downloads extended files once, content is reused by merge.
+        Returns content of all extended files by url, in order in which they are merged.
+        """
+        if self.__contents is None:
+            self.__fetch_all()
+            self.__contents = {url: self.__documents[url][0] for url in self.__get_merge_order()}
+        return self.__contents
 
     def merge(self, valhalla_yml_dict: dict) -> dict:
-        if self.extends is None or len(self.extends) < 1:
+        if len(self.extends) < 1:
             info("There is nothing to extend")
             return valhalla_yml_dict
-        elif len(self.extends) == 1:
-            info("There is one file to extend")
-            extended = get_from_url(self.extends[0])
-            extended_dict = safe_load(extended)
-            info("yml data as dictionary to extends: " + str(extended_dict))
-            info("yml data from valhalla.yml: " + str(valhalla_yml_dict))
-            result = merge(extended_dict, valhalla_yml_dict)
-            info("final yml data: " + str(result))
-            return result
-        else:
-            error("Currently you can extend only from one url!")
+
+        info(f"There are {len(self.extends)} files to extend: {self.extends}")
+        self.load()
+        merged = {}
+        resolved = {}
+        for url in self.extends:
+            merged = self.__merge(merged, self.__resolve(url, resolved), share=True)
+        debug("yml data from valhalla.yml: " + str(valhalla_yml_dict))
+        # only result is copied, extended files are shared by intermediate results which are never modified
+        result = self.__merge(merged, valhalla_yml_dict, share=False)
+        debug("final yml data: " + str(result))
+        return result
+
+    def __fetch_all(self):
+        with ThreadPoolExecutor(max_workers=EXTENDS_FETCH_WORKERS) as pool:
+            futures = {url: pool.submit(get_from_url, url) for url in dict.fromkeys(self.extends)}
+            while futures:
+                done, _ = wait(futures.values(), return_when=FIRST_COMPLETED)
+                for url in [u for u, f in futures.items() if f in done]:
+                    content = futures.pop(url).result()
+                    document = (load_yaml(content) if content else None) or {}
+                    if not isinstance(document, dict):
+                        error(f"Extended file {url} must contain YAML mapping, not {type(document).__name__}")
+                        exit(1)
+                    children = self.__get_extends(document)
+                    debug(f"yml data as dictionary to extends from {url}: {document}")
+                    self.__documents[url] = (content, document)
+                    self.__children[url] = children
+                    for child in children:
+                        if child not in self.__documents and child not in futures:
+                            futures[child] = pool.submit(get_from_url, child)
+
+    def __get_merge_order(self) -> List[str]:
+        order = []
+        for url in self.extends:
+            self.__visit(url, [], order)
+        return order
+
+    def __visit(self, url: str, path: List[str], order: List[str]):
+        if url in path:
+            error(f"Cycle in extends: {' -> '.join(path[path.index(url):] + [url])}")
             exit(1)
+        if url in order:
+            return
+        for child in self.__children[url]:
+            self.__visit(child, path + [url], order)
+        order.append(url)
+
+    def __resolve(self, url: str, resolved: dict) -> dict:
+        # file extended by many others is merged once
+        if url not in resolved:
+            merged = {}
+            for child in self.__children[url]:
+                merged = self.__merge(merged, self.__resolve(child, resolved), share=True)
+            document = {k: v for k, v in self.__documents[url][1].items() if k != "extends"}
+            resolved[url] = self.__merge(merged, document, share=True)
+        return resolved[url]
+
+    def __merge(self, parent: dict, child: dict, share: bool) -> dict:
+        return merge(parent, child, list_strategy=self.list_strategy, list_key=self.list_key, share=share)
+
+    @staticmethod
+    def __get_extends(document: dict) -> List[str]:
+        extends = document.get("extends") if isinstance(document, dict) else None
+        return list(extends) if extends else []
@@ -1,4 +1,5 @@
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from valhalla.ci_provider.get_token import get_valhalla_token
 from valhalla.ci_provider.git_host import GitHost
@@ -6,15 +7,16 @@ from valhalla.ci_provider.merge_request_hook import MergeRequestHook
 from valhalla.commit import before
 from valhalla.commit.commit import GitRepository
 from valhalla.common.checks import get_other_release_in_progress
+from valhalla.common.command_stats import phase, report_command_stats
 from valhalla.common.get_config import get_config, CommitConfig, MergeRequestConfig, Config
-from valhalla.common.logger import info, error, init_logger, init_logger_mr_hook
+from valhalla.common.logger import info, error, init_logger, init_logger_mr_hook, flush_logger
 from valhalla.common.resolver import init_str_resolver, init_str_resolver_set_version, \
-    init_str_resolver_custom_variables, resolve
+    init_str_resolver_custom_variables, resolve, get_resolve_cache_info, reset_str_resolver_custom_variables
 from valhalla.release.assets import Assets
 from valhalla.release.description import Description
 from valhalla.version.release_command import get_version_to_release_from_command
 from valhalla.version.version_to_release import BASE_PREFIX
-from valhalla.version.version_to_release import get_release_kinds, VersionToRelease
+from valhalla.version.version_to_release import get_release_kinds, VersionToRelease, ReleaseKindMatcher
 
 
 def print_help():
@@ -75,7 +77,8 @@ def start():
     init_str_resolver_custom_variables(config.variables)
 
     if version_to_release.is_version_empty():
-        version_to_release.from_config(config)
+        with phase("version"):
+            version_to_release.from_config(config)
 
     if version_to_release.is_version_empty():
         try:
@@ -83,7 +86,7 @@ def start():
         except Exception as e:
             info(f"Could not create merge request for error reporting: {e}")
             mr_hook = MergeRequestHook.Skip()
-        init_logger_mr_hook(mr_hook)
+        init_logger_mr_hook(mr_hook, background=True)
         error(
             f"Version to release is empty, exiting! Create branch with name {BASE_PREFIX}X.X.X or just {BASE_PREFIX}\n"
             f"and define in valhalla.yml version to release. You can also you VALHALLA_RELEASE_CMD to define it.\n"
@@ -94,7 +97,7 @@ def start():
     init_str_resolver_set_version(version_to_release.version_number_to_release)
 
     mr_hook = create_merge_request(git_host, config.merge_request)
-    init_logger_mr_hook(mr_hook)
+    init_logger_mr_hook(mr_hook, background=True)
 
     other_release = get_other_release_in_progress(git_host)
     if other_release:
@@ -103,21 +106,39 @@ def start():
             f"Other releases in progress: {other_release}. You should merge changes from previous releases and delete branches. CC @{{AUTHOR}}")
         exit(-1)
 
-    mr_hook.add_comment(
-        f"⏳ Release process for version {version_to_release.version_number_to_release} has started. Please wait.")
+    version = version_to_release.version_number_to_release
+    mr_hook.update_status(f"⏳ Release process for version {version} has started. Please wait.")
 
-    commit(config.commit_before_release, token)
+    if version_to_release.other_components:
+        release_components(git_host, config, version_to_release, token, mr_hook)
+    elif config.deferred_push:
+        release_with_deferred_push(git_host, config, version, token, mr_hook)
+    else:
+        with phase("commit_before_release"):
+            commit(config.commit_before_release, token)
+
+        mr_hook.update_status(f"⏳ Release process for version {version} is creating release. Please wait.")
+        with phase("release"):
+            create_release(git_host, config, version)
+
+        mr_hook.update_status(
+            f"⏳ Release process for version {version} is committing changes after release. Please wait.")
+        with phase("commit_after_release"):
+            commit(config.commit_after_release, token)
 
-    create_release(git_host, config, version_to_release.version_number_to_release)
+    mr_hook.update_status(f"✅ Release successful! Now wait for tagged version to be build. CC @{{AUTHOR}}")
+    flush_logger()
 
-    commit(config.commit_after_release, token)
+    cache_info = get_resolve_cache_info()
+    info(f"String resolver cache: hits={cache_info.hits}, misses={cache_info.misses}, size={cache_info.currsize}")
 
-    mr_hook.add_comment(f"✅ Release successful! Now wait for tagged version to be build. CC @{{AUTHOR}}")
+    report_command_stats()
 
 
 def __version_to_release(git_host: GitHost) -> VersionToRelease:
     current_dir = "."
-    release_kinds = get_release_kinds(current_dir)
+    # trie of release kinds is built once and shared by release command and branch name matching
+    release_kinds = ReleaseKindMatcher(get_release_kinds(current_dir))
     version_to_release = get_version_to_release_from_command(release_kinds)
 
     if version_to_release is None:
@@ -138,12 +159,133 @@ def create_merge_request(git_host: GitHost, merge_request_config: MergeRequestCo
         return MergeRequestHook.Skip()
 
 
-def create_release(git_host: GitHost, config: Config, version_to_release: str):
-    info("Preparing to create release")
-    ReleaseImpl = git_host.get_release_impl()
-    release = ReleaseImpl()
+def release_with_deferred_push(git_host: GitHost, config: Config, version: str, token: str,
+                               mr_hook: MergeRequestHook):
+    """
+    Commits before and after release are created locally, release commit is tagged and everything is pushed
+    with one atomic push. Release is prepared (description and assets) before commit_after_release, like
+    in other flows, and created afterwards from already pushed tag.
+    """
+    info("deferred_push is True, commits and tag will be pushed together after commit_after_release")
+    with phase("commit_before_release"):
+        commit(config.commit_before_release, token, push=False)
+
+    tag_name = get_tag_name(config, version)
+    git = __get_release_repository(config)
+    try:
+        git.tag(tag_name)
+        with phase("release"):
+            prepared_release = prepare_release(config, version, tag_name)
+
+        mr_hook.update_status(f"⏳ Release process for version {version} is committing changes after release. "
+                              f"Please wait.")
+        with phase("commit_after_release"):
+            commit(config.commit_after_release, token, push=False)
+
+        with phase("push"):
+            git.push(token, tags=[tag_name], atomic=True)
+            info("Pushed successful!")
+    finally:
+        git.close()
+
+    mr_hook.update_status(f"⏳ Release process for version {version} is creating release. Please wait.")
+    with phase("release"):
+        info("Preparing to create release")
+        release = git_host.get_release_impl()()
+        release.create(**prepared_release)
+        info("Finished creating release")
+
+
+def release_components(git_host: GitHost, config: Config, version_to_release: VersionToRelease, token: str,
+                       mr_hook: MergeRequestHook):
+    """
+    Releases all components named in branch or VALHALLA_RELEASE_CMD (f.e. release-api-1.2.0+web-3.4.1).
+    Commands and commits of components are executed one after another, because they share working tree and
+    variables, commits and tags of all components are pushed with one atomic push and then releases are created
+    concurrently with one API client.
+    """
+    components = [(version_to_release, config)]
+    for component in version_to_release.other_components:
+        components.append((component, get_config(component.get_config_file_path())))
+
+    names = ", ".join(f"{c.release_kind.filename}: {c.version_number_to_release}" for c, _ in components)
+    info(f"Releasing {len(components)} components: {names}")
+
+    git = __get_release_repository(config)
+    try:
+        tag_names = []
+        prepared_releases = []
+        for component, component_config in components:
+            version = __init_component(component, component_config)
+            mr_hook.update_status(f"⏳ Release process of {component.release_kind.filename} ({version}) is committing "
+                                  f"changes. Please wait.")
+
+            with phase(f"commit_before_release {component.release_kind.filename}"):
+                commit(component_config.commit_before_release, token, push=False)
+
+            tag_name = get_tag_name(component_config, version)
+            if tag_name in tag_names:
+                error(f"Components cannot be released with the same tag {tag_name}, set tag.name in "
+                      f"valhalla*.yml files")
+                exit(-1)
+            git.tag(tag_name)
+            tag_names.append(tag_name)
+            # description command and assets are resolved now, when variables of this component are set
+            prepared_releases.append(prepare_release(component_config, version, tag_name))
+
+            with phase(f"commit_after_release {component.release_kind.filename}"):
+                commit(component_config.commit_after_release, token, push=False)
+
+        with phase("push"):
+            git.push(token, tags=tag_names, atomic=True)
+            info("Pushed successful!")
+    finally:
+        git.close()
+
+    mr_hook.update_status(f"⏳ Release process is creating {len(prepared_releases)} releases. Please wait.")
+    with phase("release"):
+        release = git_host.get_release_impl()()
+        with ThreadPoolExecutor(max_workers=len(prepared_releases), thread_name_prefix="valhalla-release") as pool:
+            # result() rethrows errors of creating releases
+            for future in [pool.submit(release.create, **prepared) for prepared in prepared_releases]:
+                future.result()
+    info("Finished creating releases")
+
+
+def __init_component(component: VersionToRelease, config: Config) -> str:
+    reset_str_resolver_custom_variables()
+    init_str_resolver_custom_variables(config.variables)
+    if component.is_version_empty():
+        component.from_config(config)
+    if component.is_version_empty():
+        error(f"Version to release of {component.release_kind.filename} is empty, exiting! Add version to branch "
+              f"name or define it in {component.release_kind.filename}.")
+        exit(-1)
+
+    init_str_resolver_set_version(component.version_number_to_release)
+    return component.version_number_to_release
+
+
+def __get_release_repository(config: Config) -> GitRepository:
+    commit_config = config.commit_before_release or config.commit_after_release
+    if commit_config is None:
+        return GitRepository(None, None)
+    return GitRepository(commit_config.git_username, commit_config.git_email, commit_config.ignore,
+                         commit_config.large_repository, commit_config.paths)
+
+
+def get_tag_name(config: Config, version_to_release: str) -> str:
+    if config.tag_config is not None and config.tag_config.name is not None:
+        return resolve(config.tag_config.name)
+    return version_to_release
+
+
+def prepare_release(config: Config, version_to_release: str, tag_name: str | None = None) -> dict:
+    # description command and asset patterns are resolved before commands of commit_after_release change files
     description = Description(config.release_config.description_config)
+    description.get()
     assets = Assets(config.release_config.assets_config)
+    assets.get_files()
 
     if config.release_config is not None and config.release_config.milestones is not None:
         milestones = list(map(resolve, config.release_config.milestones))
@@ -155,16 +297,22 @@ def create_release(git_host: GitHost, config: Config, version_to_release: str):
     else:
         release_name = version_to_release
 
-    if config.tag_config is not None and config.tag_config.name is not None:
-        tag_name = resolve(config.tag_config.name)
-    else:
-        tag_name = version_to_release
+    return {"description": description,
+            "milestones": milestones,
+            "release_name": release_name,
+            "tag_name": tag_name or get_tag_name(config, version_to_release),
+            "assets": assets}
 
-    release.create(description, milestones, release_name, tag_name, assets)
+
+def create_release(git_host: GitHost, config: Config, version_to_release: str):
+    info("Preparing to create release")
+    ReleaseImpl = git_host.get_release_impl()
+    release = ReleaseImpl()
+    release.create(**prepare_release(config, version_to_release))
     info("Finished creating release")
 
 
-def commit(commit_config: CommitConfig, token: str):
+def commit(commit_config: CommitConfig, token: str, push: bool = True):
     if commit_config is None:
         info("Commit config is missing, skipping scripts to execute, commit, push!")
         return
@@ -172,14 +320,21 @@ def commit(commit_config: CommitConfig, token: str):
     if commit_config.enabled:
         info("Commit enabled is True so scripts, commit, push will be performed")
 
-        before.execute(commit_config.before_commands)
-        git = GitRepository(commit_config.git_username, commit_config.git_email)
-        commit_success = git.commit(commit_config.msg)
-
-        if commit_success:
-            info("Commit successful, preparing to push")
-            git.push(token)
-            info("Pushed successful!")
+        before.execute(commit_config.before_commands, commit_config.parallel, commit_config.session,
+                       commit_config.timeout)
+        git = GitRepository(commit_config.git_username, commit_config.git_email, commit_config.ignore,
+                            commit_config.large_repository, commit_config.paths)
+        try:
+            commit_success = git.commit(commit_config.msg)
+
+            if commit_success and push:
+                info("Commit successful, preparing to push")
+                git.push(token)
+                info("Pushed successful!")
+            elif commit_success:
+                info("Commit successful, push is deferred")
+        finally:
+            git.close()
 
     else:
         info("Commit disabled(enabled: False), skipping  scripts to execute, commit, push!")
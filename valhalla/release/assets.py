@@ -28,6 +28,7 @@ class Assets:
         self.links = []
         # Store file patterns but keep them out of JSON output semantics
         self._file_patterns = [resolve(p) for p in (assets.files or [])]
+        self._files = None
 
         for link in assets.links:
             self.links.append(AssetsLink(link))
@@ -48,13 +49,16 @@ class Assets:
         ]}
 
     def get_files(self) -> List[str]:
-        """Expand glob patterns into existing file paths."""
+        """Expand glob patterns into existing file paths, patterns are expanded once."""
+        if self._files is not None:
+            return self._files
         files: List[str] = []
         for pattern in self._file_patterns:
             matched = glob.glob(pattern)
             for f in matched:
                 if os.path.isfile(f):
                     files.append(f)
+        self._files = files
         return files
 
     @staticmethod
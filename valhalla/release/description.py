@@ -1,3 +1,4 @@
+from valhalla.common.command_cache import run_with_cache
 from valhalla.common.executor import Executor
 from valhalla.common.get_config import ReleaseDescriptionConfig
 from valhalla.common.logger import error, info
@@ -8,18 +9,24 @@ class Description:
 
     def __init__(self, config: ReleaseDescriptionConfig):
         self.__from_command = config.from_command
+        self.__cache = config.cache
+        self.__value = None
 
     def get(self):
+        if self.__value is not None:
+            return self.__value
+
         if self.__from_command:
             info("Getting release description from command")
-            return self.__get_from_command()
+            self.__value = self.__get_from_command()
+            return self.__value
 
         error("Currently release description can be from command! Fix your valhalla.yml!")
         exit(1)
 
     def __get_from_command(self):
         from_command = resolve(self.__from_command)
-        result = Executor.run(from_command)
+        result = run_with_cache(from_command, self.__cache, lambda: Executor.run(from_command))
 
         if result:
             return result.stdout
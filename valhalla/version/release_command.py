@@ -3,10 +3,11 @@ from typing import List
 
 from valhalla.common.logger import info, error
 from valhalla.version.version_to_release import ReleaseKind, VersionToRelease, BASE_PREFIX, \
-    get_version_to_release_from_str
+    get_version_to_release_from_str, ReleaseKindMatcher
 
 
-def get_version_to_release_from_command(release_kinds: List[ReleaseKind]) -> VersionToRelease | None:
+def get_version_to_release_from_command(
+        release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease | None:
     command = os.environ.get('VALHALLA_RELEASE_CMD')
 
     if command:
@@ -1,11 +1,29 @@
 import os
 import re
-from typing import List
+import subprocess
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
+from valhalla.common.command_cache import run_with_cache
 from valhalla.common.executor import Executor
-from valhalla.common.logger import info, error
+from valhalla.common.get_config import CommandCacheConfig
+from valhalla.common.logger import info, warn, error
 
 BASE_PREFIX = "release-"
+# separates components released together, f.e. release-api-1.2.0+web-3.4.1
+COMPONENT_SEPARATOR = "+"
+RELEASE_KIND_FILE_PATTERN = re.compile(r'valhalla(.*)\.yml')
+# directories which never contain valhalla*.yml but can contain huge number of files
+PRUNED_DIRECTORIES = frozenset({".git", ".m2", ".gradle", ".idea", ".venv", ".tox", "venv", "node_modules", "target",
+                                "build", "dist", "__pycache__", "examples"})
+# valhalla*.yml files in resources of tests (f.e. test/resources, src/test/resources) are fixtures, not release kinds
+TEST_DIRECTORIES = frozenset({"test", "tests"})
+TEST_RESOURCES_DIRECTORY = "resources"
+MAX_DEPTH_ENV_NAME = "VALHALLA_CONFIG_MAX_DEPTH"
+SEARCH_PATHS_ENV_NAME = "VALHALLA_CONFIG_SEARCH_PATHS"
+DISCOVERY_ENV_NAME = "VALHALLA_CONFIG_DISCOVERY"
+# key of trie node under which matched release kind is stored, characters of prefixes are never empty
+TRIE_VALUE_KEY = ""
 
 
 class ReleaseKind:
@@ -24,6 +42,8 @@ class VersionToRelease:
     def __init__(self, version_number_to_release: str, release_kind: ReleaseKind):
         self.version_number_to_release = version_number_to_release
         self.release_kind = release_kind
+        # next components when branch or VALHALLA_RELEASE_CMD names more than one release kind
+        self.other_components: List[VersionToRelease] = []
 
     def get_config_file_path(self):
         return self.release_kind.path + "/" + self.release_kind.filename
@@ -36,28 +56,35 @@ class VersionToRelease:
             info("Version is not specified in valhalla.yml, skipping")
             return
         else:
-            self.__get_version_from_command(config.version_config.from_command)
+            self.__get_version_from_command(config.version_config.from_command, config.version_config.cache)
         pass
 
-    def __get_version_from_command(self, from_command: str):
-        result = Executor.run(from_command)
+    def __get_version_from_command(self, from_command: str, cache: CommandCacheConfig | None):
+        result = run_with_cache(from_command, cache, lambda: Executor.run(from_command))
 
         if result:
             self.version_number_to_release = result.stdout.replace("\n", "").replace("\r", "")
 
 
 def get_release_kinds(path: str) -> List[ReleaseKind]:
+    """
+    Finds valhalla*.yml files in path, skipping PRUNED_DIRECTORIES and resources of tests. Search can be limited with environment variables:
+    VALHALLA_CONFIG_MAX_DEPTH (0 - only path), VALHALLA_CONFIG_SEARCH_PATHS (comma separated directories relative
+    to path, searched without subdirectories) and VALHALLA_CONFIG_DISCOVERY=git (only files tracked by git).
+    """
     info(f"Searching for valhalla*.yml files in: {path}")
     info(f"Current pwd: {os.getcwd()}")
 
-    pattern = re.compile(r'valhalla(.*)\.yml')
-    release_kinds = []
+    search_paths = os.getenv(SEARCH_PATHS_ENV_NAME)
+    found = __find_release_kind_files(os.path.abspath(path),
+                                      __get_max_depth(),
+                                      None if not search_paths else tuple(p.strip() for p in search_paths.split(",")),
+                                      os.getenv(DISCOVERY_ENV_NAME, "") == "git")
 
-    for root, dirs, files in os.walk(path):
-        for file in files:
-            match = pattern.match(file)
-            if match:
-                release_kinds.append(ReleaseKind(file, match.group(1), path))
+    release_kinds = []
+    for directory, file in found:
+        match = RELEASE_KIND_FILE_PATTERN.match(file)
+        release_kinds.append(ReleaseKind(file, match.group(1), path if directory == "" else os.path.join(path, directory)))
 
     for kind in release_kinds:
         info(f"Found: {kind}")
@@ -71,35 +98,183 @@ def get_release_kinds(path: str) -> List[ReleaseKind]:
     return release_kinds
 
 
-def get_version_to_release_from_str(value: str, release_kinds: List[ReleaseKind]) -> VersionToRelease:
+def __get_max_depth() -> Optional[int]:
+    max_depth = os.getenv(MAX_DEPTH_ENV_NAME)
+    if not max_depth:
+        return None
+    if not max_depth.strip().isdigit():
+        error(f"{MAX_DEPTH_ENV_NAME} must be a non-negative number, got: {max_depth}")
+        exit(-1)
+    return int(max_depth)
+
+
+def clear_release_kinds_cache():
+    __find_release_kind_files.cache_clear()
+
+
+@lru_cache(maxsize=16)
+def __find_release_kind_files(path: str, max_depth: Optional[int], search_paths: Optional[Tuple[str, ...]],
+                              use_git: bool) -> Tuple[Tuple[str, str], ...]:
+    # returns (directory relative to path, filename), files closer to path first
+    found = None
+    if search_paths is not None:
+        found = __find_in_search_paths(path, search_paths)
+    elif use_git:
+        found = __find_with_git(path)
+
+    if found is None:
+        found = __find_with_walk(path, max_depth)
+
+    if max_depth is not None:
+        found = [(d, f) for d, f in found if __depth(d) <= max_depth]
+
+    return tuple(sorted(set(found), key=lambda entry: (__depth(entry[0]), entry[0], entry[1])))
+
+
+def __find_in_search_paths(path: str, search_paths: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    found = []
+    for search_path in search_paths:
+        directory = __relative_directory(os.path.normpath(search_path))
+        absolute = os.path.join(path, directory)
+        if not os.path.isdir(absolute):
+            warn(f"Search path {search_path} for valhalla*.yml files does not exist")
+            continue
+        found += [(directory, file) for file in os.listdir(absolute)
+                  if RELEASE_KIND_FILE_PATTERN.match(file) and os.path.isfile(os.path.join(absolute, file))]
+    return found
+
+
+def __find_with_walk(path: str, max_depth: Optional[int]) -> List[Tuple[str, str]]:
+    found = []
+    for root, dirs, files in os.walk(path):
+        directory = __relative_directory(os.path.relpath(root, path))
+        # pruning dirs in place stops os.walk from entering them
+        if max_depth is not None and __depth(directory) >= max_depth:
+            dirs[:] = []
+        else:
+            dirs[:] = [d for d in dirs if not __is_pruned(os.path.join(directory, d))]
+        found += [(directory, file) for file in files if RELEASE_KIND_FILE_PATTERN.match(file)]
+    return found
+
+
+def __find_with_git(path: str) -> Optional[List[Tuple[str, str]]]:
+    try:
+        result = subprocess.run(["git", "ls-files", "-z", "--", ":(glob)**/valhalla*.yml"], cwd=path, check=True,
+                                capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        warn(f"Could not list valhalla*.yml files with git ls-files, searching directories instead: {e}")
+        return None
+
+    found = []
+    for file_path in result.stdout.split(b"\0"):
+        if file_path:
+            directory, file = os.path.split(os.fsdecode(file_path))
+            if RELEASE_KIND_FILE_PATTERN.match(file) and not __is_pruned(directory):
+                found.append((directory, file))
+    return found
+
+
+def __is_pruned(directory: str) -> bool:
+    parts = directory.split(os.sep) if directory else []
+    for i, part in enumerate(parts):
+        if part in PRUNED_DIRECTORIES:
+            return True
+        if part == TEST_RESOURCES_DIRECTORY and not TEST_DIRECTORIES.isdisjoint(parts[:i]):
+            return True
+    return False
+
+
+def __relative_directory(directory: str) -> str:
+    return "" if directory == "." else directory
+
+
+def __depth(directory: str) -> int:
+    return 0 if directory == "" else directory.count(os.sep) + 1
+
+
+class ReleaseKindMatcher:
+    """
+    Prefix trie of branch prefixes of release kinds, finds release kind with the longest prefix of branch name
+    (or VALHALLA_RELEASE_CMD) in O(length of the name). Specific release kinds win over the main one
+    (valhalla.yml, prefix release-), for the same prefix release kind with longer suffix is used, then the first one.
+    """
+
+    def __init__(self, release_kinds: List[ReleaseKind]):
+        self.release_kinds = list(release_kinds)
+        self.prefixes = [(kind, get_branch_prefix(kind)) for kind in self.release_kinds]
+        self.__root = {}
+
+        # same order as before trie was introduced, so release kinds with the same prefix are resolved the same way
+        specific = sorted([(kind, prefix) for kind, prefix in self.prefixes if kind.suffix != ""],
+                          key=lambda entry: len(entry[0].suffix), reverse=True)
+        main = [(kind, BASE_PREFIX) for kind, prefix in self.prefixes if kind.suffix == ""]
+        for kind, prefix in specific + main:
+            node = self.__root
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(TRIE_VALUE_KEY, (prefix, kind))
+
+    def match(self, value: str) -> Tuple[str, ReleaseKind] | None:
+        node = self.__root
+        matched = node.get(TRIE_VALUE_KEY)
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+            matched = node.get(TRIE_VALUE_KEY, matched)
+        return matched
+
+
+def get_release_kind_matcher(release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> ReleaseKindMatcher:
+    if isinstance(release_kinds, ReleaseKindMatcher):
+        return release_kinds
+    return ReleaseKindMatcher(release_kinds)
+
+
+def get_version_to_release_from_str(value: str,
+                                    release_kinds: List[ReleaseKind] | ReleaseKindMatcher) -> VersionToRelease:
     info(f"Analyzing {value} to match release kind")
 
-    # Sort release_kinds by the length of the branch prefix (descending)
-    release_kinds_sorted = sorted(
-        release_kinds, 
-        key=lambda rk: len(rk.suffix), 
-        reverse=True
-    )
-    
-    # first we search for specific release kinds
-    for release_kind in release_kinds_sorted:
-        if release_kind.suffix != "":
-            prefix = __get_branch_prefix(release_kind)
-            if value.startswith(prefix):
-                return __matched(value, prefix, release_kind)
-
-    info(f"{value} doesn't match specific release kind, checking main kind")
-    # now if specific release kind not found, we search for the main
-    for release_kind in release_kinds:
-        if release_kind.suffix == "":
-            prefix = BASE_PREFIX
-            if value.startswith(prefix):
-                return __matched(value, prefix, release_kind)
-
-    return __no_matching_release_kind(value, release_kinds)
-
-
-def __get_branch_prefix(release_kind: ReleaseKind) -> str:
+    matcher = get_release_kind_matcher(release_kinds)
+    components = __split_components(value, matcher)
+    if len(components) > 1:
+        info(f"{value} contains {len(components)} components: {components}")
+
+    versions = [__match_component(component, matcher) for component in components]
+    if None in versions:
+        return None
+    kinds = [version.release_kind for version in versions]
+    if len(versions) > 1 and len(set(map(id, kinds))) != len(kinds):
+        error(f"Every component of {value} must match different release kind, matched: {kinds}")
+        exit(-1)
+
+    versions[0].other_components = versions[1:]
+    return versions[0]
+
+
+def __split_components(value: str, matcher: ReleaseKindMatcher) -> List[str]:
+    parts = value.split(COMPONENT_SEPARATOR)
+    components = [parts[0]]
+    for part in parts[1:]:
+        matched = matcher.match(BASE_PREFIX + part)
+        if matched is not None and matched[1].suffix != "":
+            components.append(BASE_PREFIX + part)
+        else:
+            # not a release kind, f.e. build metadata of version 1.2.0+build.5
+            components[-1] += COMPONENT_SEPARATOR + part
+    return components
+
+
+def __match_component(value: str, matcher: ReleaseKindMatcher) -> VersionToRelease:
+    matched = matcher.match(value)
+    if matched is not None:
+        prefix, release_kind = matched
+        return __matched(value, prefix, release_kind)
+
+    return __no_matching_release_kind(value, matcher)
+
+
+def get_branch_prefix(release_kind: ReleaseKind) -> str:
     prefix = (BASE_PREFIX + release_kind.suffix).replace("--", "-")
     if prefix.endswith("-"):
         return prefix
@@ -114,13 +289,12 @@ def __matched(value: str, prefix: str, release_kind: ReleaseKind) -> VersionToRe
     return VersionToRelease(project_version, release_kind)
 
 
-def __no_matching_release_kind(value: str, release_kinds: List[ReleaseKind]):
+def __no_matching_release_kind(value: str, matcher: ReleaseKindMatcher):
     error(
         'This is a release branch or VALHALLA_RELEASE_CMD was used, but valhalla could not find matching valhalla.yml file!')
     error(f'Name of branch or VALHALLA_RELEASE_CMD is: {value}')
-    for kind in release_kinds:
+    for kind, prefix in matcher.prefixes:
         error(f'Available release kind: {kind}')
-        prefix = __get_branch_prefix(kind)
         error(
             f'To match this release kind your branch or VALHALLA_RELEASE_CMD must starts with {prefix} f.e {prefix}1.5.3')
 